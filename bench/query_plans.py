@@ -0,0 +1,226 @@
+"""
+EXPLAIN QUERY PLAN checks for the queries in web/models.py and cli/*.py.
+
+Builds throwaway server and local databases from db/schema.sql and
+db/migrations.py, calls the real query functions against them and records
+every statement they run. Each statement's plan is then checked: a data
+table must never be scanned in full, results must come off an index in
+order rather than through a temp B-tree (ranked search excepted), and the
+task filters must use their partial indexes.
+
+tests/test_query_plans.py runs every check as its own pytest test, so CI
+fails on any violation. To print the plans by hand:
+
+    python -m bench.query_plans            # or -v to print every plan
+"""
+import argparse
+import os
+import sys
+import tempfile
+import uuid
+from collections import namedtuple
+from pathlib import Path
+from types import SimpleNamespace
+
+# Tables that may be scanned: the outbox is a queue read whole by design,
+# sqlite_master is read to check whether the search indexes exist
+ALLOWED_SCANS = {"sync_outbox", "sqlite_master", "CONSTANT"}
+PLANNED = ("SELECT", "UPDATE", "DELETE", "INSERT INTO sync_outbox")
+
+# uses: an index the plan must mention; allow_sort: ranked results may sort
+Check = namedtuple("Check", "name call uses allow_sort", defaults=(None, False))
+
+
+class StatementRecorder:
+    """sqlite3 trace callback collecting the statements run during a check."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, sql):
+        statement = sql.strip()
+        if statement.startswith(PLANNED):
+            self.statements.append(statement)
+
+    def take(self):
+        statements, self.statements = self.statements, []
+        return statements
+
+
+def plan(conn, statement):
+    """Detail lines of EXPLAIN QUERY PLAN for an executed statement."""
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + statement)]
+
+
+def violations(details, check):
+    """Plan lines that mean a full table scan or an unindexed sort, or the missing index."""
+    found = []
+    for detail in details:
+        words = detail.split()
+        if words[0] == "SCAN" and "VIRTUAL TABLE" not in detail and words[1] not in ALLOWED_SCANS:
+            found.append(detail)
+        elif "USE TEMP B-TREE" in detail and not check.allow_sort:
+            found.append(detail)
+    if check.uses and not any(f"INDEX {check.uses} " in detail for detail in details):
+        found.append(f"expected to use {check.uses}")
+    return found
+
+
+# ========================
+# Fixtures
+# ========================
+def server_env(db_path):
+    """Seed a server DB for SERVER_CHECKS. Returns the namespace the checks run against."""
+    os.environ.setdefault("SECRET_KEY", "query-plans-" + "x" * 32)
+    from web import models
+    from web.utils import get_db_connection, init_server_db
+
+    init_server_db(db_path)
+    user_id = models.create_user(db_path, f"plans-{uuid.uuid4().hex[:6]}", "hash")
+    task_id = models.create_task(db_path, user_id, "Pay rent", "monthly", "2025-07-01", 1)
+    return SimpleNamespace(
+        models=models, db_path=db_path, conn=get_db_connection(db_path), user_id=user_id, task_id=task_id,
+        note_id=models.create_note(db_path, user_id, "Rent receipt"),
+        expense_id=models.create_expense(db_path, user_id, 950.0, "rent", "July", "2025-07-01"),
+        pushed={"tasks": [{"id": task_id, "title": "Pay rent now", "last_modified": "2099-01-01T00:00:00Z"}]},
+    )
+
+
+def client_env(local_path, user_id):
+    """Seed a local DB for CLIENT_CHECKS. Returns the namespace the checks run against."""
+    import cli.utils as cli_utils
+    from cli import tasks, notes, expenses, search, sync
+
+    cli_utils.LOCAL_DB_PATH = Path(local_path)
+    conn = cli_utils.initialize_local_db()
+    task_id = tasks.create_task(user_id, "Pay rent", "monthly", "2025-07-01", 1)
+    notes.create_note(user_id, "Rent receipt")
+    expenses.create_expense(user_id, 950.0, "rent", "2025-07-01", "July")
+    return SimpleNamespace(
+        utils=cli_utils, tasks=tasks, notes=notes, expenses=expenses, search=search, sync=sync,
+        conn=conn, user_id=user_id, anchor=("2025-07-01T00:00:00Z", task_id),
+        page={"tasks": [{"id": task_id, "title": "Pay rent", "last_modified": "2099-01-01T00:00:00Z",
+                         "user_id": user_id, "seq": 9}]},
+    )
+
+
+def _gather_and_settle(env):
+    changes, last_op = env.sync._gather_changes(env.conn, env.user_id)
+    env.sync._mark_pushed(env.conn, changes, last_op)
+    env.conn.commit()
+
+
+# ========================
+# Checks
+# ========================
+# Each call takes the namespace from server_env/client_env. Checks run in
+# order and some write, so later ones see the earlier ones' changes.
+SERVER_CHECKS = [
+    Check("web.get_user_by_username", lambda e: e.models.get_user_by_username(e.db_path, "plans")),
+    Check("web.get_user_by_id", lambda e: e.models.get_user_by_id(e.db_path, e.user_id)),
+    Check("web.get_tasks", lambda e: e.models.get_tasks(e.db_path, e.user_id)),
+    Check("web.get_tasks(status)", lambda e: e.models.get_tasks(e.db_path, e.user_id, status="pending"),
+          uses="idx_tasks_user_status_live"),
+    Check("web.get_tasks(priority)", lambda e: e.models.get_tasks(e.db_path, e.user_id, priority=1),
+          uses="idx_tasks_user_priority_live"),
+    Check("web.get_tasks(due_date)", lambda e: e.models.get_tasks(e.db_path, e.user_id, due_date="2025-07-01"),
+          uses="idx_tasks_user_due_live"),
+    Check("web.get_tasks(all filters)",
+          lambda e: e.models.get_tasks(e.db_path, e.user_id, None, "pending", 1, "2025-07-01")),
+    Check("web.get_tasks(search)", lambda e: e.models.get_tasks(e.db_path, e.user_id, "rent"), allow_sort=True),
+    Check("web.get_notes", lambda e: e.models.get_notes(e.db_path, e.user_id)),
+    Check("web.get_notes(search)", lambda e: e.models.get_notes(e.db_path, e.user_id, "rent"), allow_sort=True),
+    Check("web.get_expenses", lambda e: e.models.get_expenses(e.db_path, e.user_id)),
+    Check("web.get_expenses(range)",
+          lambda e: e.models.get_expenses(e.db_path, e.user_id, None, "2025-01-01", "2025-12-31")),
+    Check("web.get_expenses(search)", lambda e: e.models.get_expenses(e.db_path, e.user_id, "rent"),
+          allow_sort=True),
+    Check("web.get_expense_summary",
+          lambda e: e.models.get_expense_summary(e.db_path, e.user_id, "2025-01", "2025-12")),
+    Check("web.get_monthly_spend", lambda e: e.models.get_monthly_spend(e.db_path, e.user_id)),
+    Check("web.get_dashboard", lambda e: e.models.get_dashboard(e.db_path, e.user_id, "2025-07")),
+    Check("web.update_task", lambda e: e.models.update_task(e.db_path, e.task_id, status="completed")),
+    Check("web.update_note", lambda e: e.models.update_note(e.db_path, e.note_id, "Rent receipt (paid)")),
+    Check("web.update_expense", lambda e: e.models.update_expense(e.db_path, e.expense_id, amount=975.0)),
+    Check("web.get_item_by_id", lambda e: e.models.get_item_by_id(e.db_path, "tasks", e.task_id)),
+    Check("web.get_all_items", lambda e: e.models.get_all_items(e.db_path, "tasks", e.user_id)),
+    Check("web.get_deleted_items", lambda e: e.models.get_deleted_items(e.db_path, "tasks", e.user_id)),
+    Check("web.apply_pushed_items", lambda e: e.models.apply_pushed_items(e.db_path, e.user_id, e.pushed)),
+    Check("web.get_items_page", lambda e: e.models.get_items_page(e.db_path, e.user_id, 0, None, 2)),
+    Check("web.get_user_seq", lambda e: e.models.get_user_seq(e.db_path, e.user_id)),
+    Check("web.delete_note", lambda e: e.models.delete_note(e.db_path, e.note_id)),
+]
+
+CLIENT_CHECKS = [
+    Check("cli.fetch_tasks", lambda e: e.tasks.fetch_tasks(e.user_id)),
+    Check("cli.fetch_notes", lambda e: e.notes.fetch_notes(e.user_id)),
+    Check("cli.fetch_expenses", lambda e: e.expenses.fetch_expenses(e.user_id)),
+    Check("cli.fetch_tasks_page", lambda e: e.tasks.fetch_tasks_page(e.user_id)),
+    Check("cli.fetch_tasks_page(anchor)", lambda e: e.tasks.fetch_tasks_page(e.user_id, e.anchor)),
+    Check("cli.fetch_tasks_page(back)", lambda e: e.tasks.fetch_tasks_page(e.user_id, e.anchor, forward=False)),
+    Check("cli.fetch_expenses_page", lambda e: e.expenses.fetch_expenses_page(e.user_id)),
+    Check("cli.search", lambda e: e.search.search(e.user_id, "rent"), allow_sort=True),
+    Check("cli.has_pending_changes", lambda e: e.utils.has_pending_changes(e.conn)),
+    Check("cli.sync gather + settle", _gather_and_settle),
+    Check("cli.sync apply page", lambda e: (e.sync._apply_page(e.conn, e.page), e.conn.commit())),
+]
+
+
+def check_plans(env, check):
+    """Run one check with statement tracing. Returns (plan lines, violations)."""
+    recorder = StatementRecorder()
+    env.conn.set_trace_callback(recorder)
+    try:
+        check.call(env)
+    finally:
+        env.conn.set_trace_callback(None)
+    details = []
+    for statement in recorder.take():
+        details.extend(detail for detail in plan(env.conn, statement) if detail not in details)
+    return details, violations(details, check)
+
+
+# ========================
+# Runner
+# ========================
+def run_checks(env, checks, verbose):
+    """Run each check and print its result. Returns the failure count."""
+    failures = 0
+    for check in checks:
+        details, bad = check_plans(env, check)
+        failures += bool(bad)
+        print(f"  {'❌' if bad else '✅'} {check.name}")
+        for detail in (details if verbose else bad):
+            print(f"       {detail}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check query plans against the current indexes.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan line, not just failures")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from web.utils import close_db_connections
+        from cli.utils import close_local_db
+
+        server = server_env(os.path.join(tmp, "server.db"))
+        print("Server (web/models.py):")
+        failures = run_checks(server, SERVER_CHECKS, args.verbose)
+
+        client = client_env(os.path.join(tmp, "local_cache.db"), server.user_id)
+        print("Client (cli/):")
+        failures += run_checks(client, CLIENT_CHECKS, args.verbose)
+
+        close_db_connections()
+        close_local_db()
+
+    if failures:
+        print(f"❌ {failures} checks use a full scan, a temp B-tree sort or the wrong index.")
+        return 1
+    print("✅ All queries are served by indexes.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+Load benchmark for the /api/sync endpoint.
+
+Seeds a throwaway server DB through create_app(), then drives sync_data
+through the Flask test client with the request mixes real clients send:
+
+  cold_hydration  a new device pulls everything, following next_cursor
+  small_delta     a few edits are pushed and the matching delta is pulled
+  large_push      a batch of brand-new rows is pushed in one request
+  conflict_push   a batch of stale edits is pushed; every item loses
+
+Reports p50/p95/p99 latency, rows/s and peak RSS per scenario. Save a
+baseline with --save and check a later run against it with --compare.
+
+Usage:
+    python -m bench.sync_load --users 4 --rows 2000 --save bench/baseline.json
+    python -m bench.sync_load --compare bench/baseline.json
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TABLES = ("tasks", "notes", "expenses")
+SCENARIOS = ("cold_hydration", "small_delta", "large_push", "conflict_push")
+
+
+# ========================
+# Fixtures
+# ========================
+def _timestamp(offset_seconds=0):
+    moment = datetime.now(timezone.utc) + timedelta(seconds=offset_seconds)
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def make_item(table, user_id, last_modified, item_id=None):
+    """A full pushed item for `table` with plausible field sizes."""
+    item = {'id': item_id or str(uuid.uuid4()), 'user_id': user_id, 'last_modified': last_modified}
+    if table == 'tasks':
+        item.update(title='Benchmark task', description='x' * 120, due_date='2025-06-30',
+                    priority=2, status='pending', is_deleted=0)
+    elif table == 'notes':
+        item.update(content='Benchmark note ' * 20, is_deleted=0)
+    else:
+        item.update(amount=12.5, category='food', description='lunch', date='2025-06-30', is_deleted=0)
+    return item
+
+
+def create_bench_app(db_path):
+    """Build the app against a fresh DB, the same way the server starts."""
+    os.environ['DB_PATH'] = db_path
+    os.environ.setdefault('SECRET_KEY', 'bench-secret-key-' + 'x' * 32)
+    from web.app import create_app
+    return create_app()
+
+
+def seed(app, users, rows):
+    """Register `users` accounts, each with `rows` rows per table. Returns [(user_id, headers)]."""
+    from web import models
+
+    client = app.test_client()
+    accounts = []
+    for index in range(users):
+        response = client.post('/api/register', json={
+            'username': f'bench-{index}-{uuid.uuid4().hex[:6]}', 'password': 'bench-password'
+        })
+        body = response.get_json()
+        user_id = body['user_id']
+        accounts.append((user_id, {'Authorization': f"Bearer {body['token']}"}))
+
+        stamp = _timestamp(-3600)
+        models.apply_pushed_items(app.config['DB_PATH'], user_id, {
+            table: [make_item(table, user_id, stamp) for _ in range(rows)] for table in TABLES
+        })
+    return accounts
+
+
+# ========================
+# Client
+# ========================
+class SyncClient:
+    """Posts /api/sync the way the CLI does: gzip both ways, streamed pages."""
+
+    def __init__(self, app, compress=True):
+        self.client = app.test_client()
+        self.compress = compress
+
+    def post(self, headers, payload):
+        body = json.dumps(payload).encode('utf-8')
+        headers = dict(headers, **{'Content-Type': 'application/json'})
+        if self.compress:
+            body = gzip.compress(body)
+            headers.update({'Content-Encoding': 'gzip', 'Accept-Encoding': 'gzip'})
+        response = self.client.post('/api/sync', data=body, headers=headers)
+        data = response.get_data()
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/sync returned {response.status_code}: {data[:200]!r}")
+        if response.headers.get('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return json.loads(data)
+
+    def sync(self, headers, payload):
+        """One sync, following next_cursor. Returns (last response, rows moved)."""
+        result = self.post(headers, payload)
+        rows = result['stats']['push']['received'] + result['stats']['pull']['rows']
+        while result.get('next_cursor'):
+            result = self.post(headers, {
+                'cursor': result['next_cursor'], 'page_size': payload.get('page_size'), 'stream': True
+            })
+            rows += result['stats']['pull']['rows']
+        return result, rows
+
+
+# ========================
+# Scenarios
+# ========================
+def cold_hydration(client, account, ctx):
+    _, headers = account
+    return client.sync(headers, {'page_size': ctx['page_size'], 'stream': True})
+
+
+def small_delta(client, account, ctx):
+    user_id, headers = account
+    last_seq = ctx['seqs'].get(user_id, 0)
+    pushed = {'tasks': [make_item('tasks', user_id, _timestamp()) for _ in range(ctx['delta'])]}
+    result, rows = client.sync(headers, dict(pushed, last_sync_seq=last_seq,
+                                             page_size=ctx['page_size'], stream=True))
+    ctx['seqs'][user_id] = result['server_seq']
+    return result, rows
+
+
+def _push_only(client, headers, pushed):
+    """Push without pulling: one request, pull page cut to a single row."""
+    result = client.post(headers, dict(pushed, page_size=1, stream=True))
+    return result, result['stats']['push']['received']
+
+
+def large_push(client, account, ctx):
+    user_id, headers = account
+    stamp = _timestamp()
+    return _push_only(client, headers, {
+        table: [make_item(table, user_id, stamp) for _ in range(ctx['batch'])] for table in TABLES
+    })
+
+
+def conflict_push(client, account, ctx):
+    user_id, headers = account
+    stale = _timestamp(-86400)
+    return _push_only(client, headers, {
+        table: [make_item(table, user_id, stale, item_id) for item_id in ctx['ids'][user_id][table]]
+        for table in TABLES
+    })
+
+
+def _existing_ids(db_path, accounts, limit):
+    """Up to `limit` existing item IDs per user and table, for conflict pushes."""
+    from web.utils import get_db_connection
+
+    ids = {}
+    with get_db_connection(db_path) as conn:
+        for user_id, _ in accounts:
+            ids[user_id] = {
+                table: [row['id'] for row in conn.execute(
+                    f"SELECT id FROM {table} WHERE user_id = ? LIMIT ?", (user_id, limit)
+                )]
+                for table in TABLES
+            }
+    return ids
+
+
+def _current_seqs(db_path, accounts):
+    from web import models
+    return {user_id: models.get_user_seq(db_path, user_id) for user_id, _ in accounts}
+
+
+# ========================
+# Measurement
+# ========================
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_scenario(name, client, accounts, ctx, iterations):
+    scenario = globals()[name]
+    latencies, total_rows = [], 0
+    started = time.perf_counter()
+    for index in range(iterations):
+        account = accounts[index % len(accounts)]
+        request_started = time.perf_counter()
+        _, rows = scenario(client, account, ctx)
+        latencies.append((time.perf_counter() - request_started) * 1000)
+        total_rows += rows
+    elapsed = time.perf_counter() - started
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'rows_per_s': round(total_rows / elapsed, 1) if elapsed else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions of `results` against a saved baseline."""
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {previous[metric]} -> {current[metric]}")
+        if previous.get('rows_per_s') and current['rows_per_s'] < previous['rows_per_s'] * (1 - tolerance):
+            regressions.append(f"{name}.rows_per_s: {previous['rows_per_s']} -> {current['rows_per_s']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark /api/sync under load.")
+    parser.add_argument('--users', type=int, default=4, help="seeded users (default 4)")
+    parser.add_argument('--rows', type=int, default=2000, help="seeded rows per table per user (default 2000)")
+    parser.add_argument('--iterations', type=int, default=20, help="requests per scenario (default 20)")
+    parser.add_argument('--page-size', type=int, default=500, help="pull page size (default 500)")
+    parser.add_argument('--delta', type=int, default=10, help="rows pushed per small delta (default 10)")
+    parser.add_argument('--batch', type=int, default=1000, help="rows per table in large/conflict pushes (default 1000)")
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help="run only these scenarios")
+    parser.add_argument('--no-compress', action='store_true', help="send and accept plain JSON")
+    parser.add_argument('--save', metavar='PATH', help="write the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="fail if slower than this baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed regression (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    config = {key: getattr(args, key) for key in ('users', 'rows', 'iterations', 'page_size', 'delta', 'batch')}
+    config['compress'] = not args.no_compress
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'server.db')
+        app = create_bench_app(db_path)
+        print(f"Seeding {args.users} users x {args.rows} rows per table...")
+        accounts = seed(app, args.users, args.rows)
+
+        client = SyncClient(app, compress=config['compress'])
+        ctx = {
+            'page_size': args.page_size, 'delta': args.delta, 'batch': args.batch,
+            'seqs': _current_seqs(db_path, accounts),
+            'ids': _existing_ids(db_path, accounts, args.batch),
+        }
+        results = {'config': config, 'scenarios': {}}
+        for name in args.scenario or SCENARIOS:
+            results['scenarios'][name] = stats = run_scenario(name, client, accounts, ctx, args.iterations)
+            print(f"  {name:<16} p50 {stats['p50_ms']:>9.2f} ms  p95 {stats['p95_ms']:>9.2f} ms  "
+                  f"p99 {stats['p99_ms']:>9.2f} ms  {stats['rows_per_s']:>10.1f} rows/s  "
+                  f"peak RSS {stats['peak_rss_mb']} MB")
+
+        from web.utils import close_db_connections
+        close_db_connections()
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            print("⚠️  Baseline was recorded with different settings; comparing anyway.")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("✅ No regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,52 +1,41 @@
-import requests
-import json
-from pathlib import Path
-from colorama import init, Fore
 from cli.constants import LOGIN_ENDPOINT, REGISTER_ENDPOINT
 from cli.exceptions import APIError, AuthenticationError
-
-init(autoreset=True)
-
-SESSION_FILE = Path('.synqlikk_session.json')
+from cli.utils import print_success, print_info
+from cli import config, http_client
 
 
 def save_session(token: str, user_id: str):
-    """Save session token and user_id locally."""
-    SESSION_FILE.write_text(json.dumps({
+    """Save session token and user_id locally, starting a fresh session."""
+    config.write_session({
         "token": token,
         "user_id": user_id
-    }))
+    })
 
 
 def load_session():
-    """Load session token if exists."""
-    if SESSION_FILE.exists():
-        try:
-            data = json.loads(SESSION_FILE.read_text())
-            return data.get('token'), data.get('user_id')
-        except json.JSONDecodeError:
-            clear_session()
-    return None, None
+    """Return (token, user_id) of the saved session, or (None, None)."""
+    data = config.read_session()
+    return data.get('token'), data.get('user_id')
 
 
 def clear_session():
     """Remove saved session."""
-    if SESSION_FILE.exists():
-        SESSION_FILE.unlink()
+    config.clear_session()
 
 
 def register(username: str, password: str):
     """Register a new user via server API."""
+    import requests  # only commands that reach the server pay for this import
     try:
-        resp = requests.post(REGISTER_ENDPOINT, json={
+        resp = http_client.post(REGISTER_ENDPOINT, json={
             "username": username,
             "password": password
         }, timeout=10)
         data = resp.json()
         if resp.status_code == 201:
             save_session(data['token'], data['user_id'])
-            print(Fore.GREEN + "✅ Registration successful!")
-            print(Fore.CYAN + "🔄 Syncing all server records to local DB...")
+            print_success("✅ Registration successful!")
+            print_info("🔄 Syncing all server records to local DB...")
 
             # Lazy import to avoid circular import
             from cli.sync import sync_all
@@ -59,16 +48,17 @@ def register(username: str, password: str):
 
 def login(username: str, password: str):
     """Login existing user via server API."""
+    import requests
     try:
-        resp = requests.post(LOGIN_ENDPOINT, json={
+        resp = http_client.post(LOGIN_ENDPOINT, json={
             "username": username,
             "password": password
         }, timeout=10)
         data = resp.json()
         if resp.status_code == 200:
             save_session(data['token'], data['user_id'])
-            print(Fore.GREEN + "✅ Login successful!")
-            print(Fore.CYAN + "🔄 Syncing all server records to local DB...")
+            print_success("✅ Login successful!")
+            print_info("🔄 Syncing all server records to local DB...")
 
             # Lazy import to avoid circular import
             from cli.sync import sync_all
@@ -0,0 +1,109 @@
+# cli/autosync.py
+"""
+Opt-in background sync for the interactive CLI (SYNQLIKK_AUTO_SYNC=1).
+
+A daemon thread with its own DB connection watches for local writes via
+PRAGMA data_version, which changes whenever another connection commits.
+Once writes have settled for AUTO_SYNC_DEBOUNCE seconds and the sync outbox
+holds changes, it runs a quiet sync. It also syncs every AUTO_SYNC_INTERVAL
+seconds (with jitter) to pull server changes. The menu never waits on the network;
+on exit only a final short flush is awaited.
+"""
+import os
+import random
+import threading
+import time
+from cli.constants import (AUTO_SYNC_INTERVAL, AUTO_SYNC_JITTER, AUTO_SYNC_DEBOUNCE,
+                           AUTO_SYNC_EXIT_TIMEOUT)
+from cli.utils import open_local_db, has_pending_changes
+
+POLL_SECONDS = 0.5
+
+_worker = None
+
+
+def enabled():
+    """True when the user opted in with SYNQLIKK_AUTO_SYNC=1."""
+    return os.getenv("SYNQLIKK_AUTO_SYNC", "").lower() in ("1", "true", "yes", "on")
+
+
+def _jittered(seconds):
+    return seconds * random.uniform(1 - AUTO_SYNC_JITTER, 1 + AUTO_SYNC_JITTER)
+
+
+class AutoSyncWorker(threading.Thread):
+    """Background thread that pushes debounced local writes and pulls on a schedule."""
+
+    def __init__(self):
+        super().__init__(name="synqlikk-autosync", daemon=True)
+        self._stop_event = threading.Event()
+        self.last_error = None
+
+    def stop(self, timeout=AUTO_SYNC_EXIT_TIMEOUT):
+        """Ask the worker to flush pending writes and exit; wait at most `timeout` seconds."""
+        self._stop_event.set()
+        self.join(timeout)
+
+    def _sync(self, conn):
+        # Imported here so the thread starts without pulling in requests
+        from cli.auth import is_authenticated
+        from cli.sync import sync_all
+        if not is_authenticated():
+            return
+        try:
+            # Skip the round if a foreground sync is already running
+            sync_all(conn=conn, quiet=True, blocking=False)
+            self.last_error = None
+        except Exception as e:  # keep the worker alive; retry next round
+            self.last_error = e
+
+    def run(self):
+        conn = open_local_db()
+        try:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            changed_at = None
+            next_sync = time.monotonic() + _jittered(AUTO_SYNC_INTERVAL)
+
+            while not self._stop_event.wait(POLL_SECONDS):
+                now = time.monotonic()
+                current = conn.execute("PRAGMA data_version").fetchone()[0]
+                if current != version:
+                    version, changed_at = current, now  # debounce restarts on every write
+
+                settled = changed_at is not None and now - changed_at >= AUTO_SYNC_DEBOUNCE
+                if (settled and has_pending_changes(conn)) or now >= next_sync:
+                    self._sync(conn)
+                    changed_at = None
+                    next_sync = time.monotonic() + _jittered(AUTO_SYNC_INTERVAL)
+
+            # Final flush on exit: push whatever is still waiting
+            if has_pending_changes(conn):
+                self._sync(conn)
+        finally:
+            conn.close()
+
+
+def start():
+    """Start the background worker if enabled and not already running."""
+    global _worker
+    if enabled() and _worker is None:
+        _worker = AutoSyncWorker()
+        _worker.start()
+    return _worker
+
+
+def is_running():
+    return _worker is not None and _worker.is_alive()
+
+
+def stop():
+    """
+    Stop the worker, waiting up to AUTO_SYNC_EXIT_TIMEOUT for its final flush.
+    Returns True if it finished; anything left unsynced goes on the next run.
+    """
+    global _worker
+    if _worker is None:
+        return True
+    worker, _worker = _worker, None
+    worker.stop()
+    return not worker.is_alive()
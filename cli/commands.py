@@ -0,0 +1,169 @@
+# cli/commands.py
+"""
+Non-interactive subcommands for scripts, cron jobs and shell aliases:
+
+    python -m cli.main task add "Pay rent" --due 2025-07-01 --priority 1
+    python -m cli.main expense list --json
+    python -m cli.main search "rent"
+    python -m cli.main sync
+
+Modules are imported only by the commands that need them, and nothing
+reaches the network except `sync`, so these start much faster than the
+interactive menu.
+"""
+import argparse
+import json
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from cli.constants import SEARCH_LIMIT
+
+
+def _iso_date(value):
+    """argparse type for YYYY-MM-DD dates."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD")
+
+
+def _user_id():
+    """Return the logged-in user's ID, or None after printing a hint to stderr."""
+    from cli.auth import load_session
+    _, user_id = load_session()
+    if not user_id:
+        print("⚠️ You must log in first: run the CLI without arguments.", file=sys.stderr)
+    return user_id
+
+
+def _print_rows(rows, columns, as_json):
+    """Print rows as JSON or as a table of the given columns."""
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print("No items found.")
+        return
+    from tabulate import tabulate
+    headers = [column.replace("_", " ").title() for column in columns]
+    print(tabulate([[row[column] for column in columns] for row in rows], headers=headers, tablefmt="grid"))
+
+
+# ==========================
+# Commands
+# ==========================
+def task_add(args, user_id):
+    from cli.tasks import create_task
+    task_id = create_task(user_id, args.title, args.description, args.due or "", args.priority)
+    print(f"✅ Task added locally: {task_id}")
+
+def task_list(args, user_id):
+    from cli.tasks import fetch_tasks
+    _print_rows(fetch_tasks(user_id), ("id", "title", "status", "priority", "due_date"), args.json)
+
+def note_add(args, user_id):
+    from cli.notes import create_note
+    note_id = create_note(user_id, args.content)
+    print(f"✅ Note added locally: {note_id}")
+
+def note_list(args, user_id):
+    from cli.notes import fetch_notes
+    _print_rows(fetch_notes(user_id), ("id", "content", "last_modified"), args.json)
+
+def expense_add(args, user_id):
+    from cli.expenses import create_expense
+    exp_id = create_expense(user_id, args.amount, args.category, args.date, args.description)
+    print(f"✅ Expense added locally: {exp_id}")
+
+def expense_list(args, user_id):
+    from cli.expenses import fetch_expenses
+    _print_rows(fetch_expenses(user_id), ("id", "amount", "category", "date", "description"), args.json)
+
+def import_command(args, user_id):
+    from cli.importer import import_file
+    try:
+        stats = import_file(user_id, args.table, args.file, args.format)
+    except (OSError, ValueError) as e:
+        print(f"❌ Import failed: {e}", file=sys.stderr)
+        return 1
+    print(f"✅ Imported {stats['imported']:,} {args.table} in {stats['seconds']}s "
+          f"({stats['duplicates']:,} already present, {stats['invalid']:,} invalid). Run 'sync' to push them.")
+    for error in stats["errors"]:
+        print(f"   ⚠️ {error}", file=sys.stderr)
+    return 0
+
+def search_command(args, user_id):
+    from cli.search import search
+    results = search(user_id, args.term, args.table or ("tasks", "notes", "expenses"), args.limit)
+    _print_rows(results, ("kind", "id", "label", "snippet"), args.json)
+
+def sync_command(args, user_id):
+    from cli.sync import sync_all
+    return 0 if sync_all(force_full=args.full) else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="synqlikk",
+        description="SynQlikk CLI. Run without arguments for the interactive menu."
+    )
+    groups = parser.add_subparsers(dest="group", required=True)
+
+    task = groups.add_parser("task", help="manage tasks").add_subparsers(dest="action", required=True)
+    add = task.add_parser("add", help="add a task")
+    add.add_argument("title")
+    add.add_argument("--description", default="")
+    add.add_argument("--due", type=_iso_date, help="due date (YYYY-MM-DD)")
+    add.add_argument("--priority", type=int, choices=(1, 2, 3), default=2, help="1=High, 2=Medium, 3=Low")
+    add.set_defaults(handler=task_add)
+    listing = task.add_parser("list", help="list tasks")
+    listing.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    listing.set_defaults(handler=task_list)
+
+    note = groups.add_parser("note", help="manage notes").add_subparsers(dest="action", required=True)
+    add = note.add_parser("add", help="add a note")
+    add.add_argument("content")
+    add.set_defaults(handler=note_add)
+    listing = note.add_parser("list", help="list notes")
+    listing.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    listing.set_defaults(handler=note_list)
+
+    expense = groups.add_parser("expense", help="manage expenses").add_subparsers(dest="action", required=True)
+    add = expense.add_parser("add", help="add an expense")
+    add.add_argument("amount", type=float)
+    add.add_argument("category")
+    add.add_argument("--date", type=_iso_date, default=date.today().isoformat(), help="YYYY-MM-DD (default today)")
+    add.add_argument("--description", default="")
+    add.set_defaults(handler=expense_add)
+    listing = expense.add_parser("list", help="list expenses")
+    listing.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    listing.set_defaults(handler=expense_list)
+
+    importer = groups.add_parser("import", help="bulk import rows from a CSV or JSONL file")
+    importer.add_argument("table", choices=("tasks", "notes", "expenses"))
+    importer.add_argument("file", type=Path)
+    importer.add_argument("--format", choices=("csv", "jsonl"), help="default: from the file extension")
+    importer.set_defaults(handler=import_command)
+
+    search = groups.add_parser("search", help="full-text search across tasks, notes and expenses")
+    search.add_argument("term")
+    search.add_argument("--table", action="append", choices=("tasks", "notes", "expenses"),
+                        help="search only this table (repeatable)")
+    search.add_argument("--limit", type=int, default=SEARCH_LIMIT, help=f"max results (default {SEARCH_LIMIT})")
+    search.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    search.set_defaults(handler=search_command)
+
+    sync = groups.add_parser("sync", help="two-way sync with the server")
+    sync.add_argument("--full", action="store_true", help="pull every server record")
+    sync.set_defaults(handler=sync_command)
+
+    return parser
+
+
+def run(argv):
+    """Parse argv, run the chosen command and return the process exit code."""
+    args = build_parser().parse_args(argv)
+    user_id = _user_id()
+    if not user_id:
+        return 1
+    return args.handler(args, user_id) or 0
@@ -0,0 +1,95 @@
+# cli/config.py
+"""
+Session store for the CLI: the auth token, user ID and sync watermarks
+(last_sync_seq, last_sync_time, an interrupted pull's cursor) kept in
+SESSION_FILE.
+
+Reads are served from an in-process cache that is refreshed only when the
+file's mtime or size changes, so CRUD calls and syncs don't re-read and
+re-parse it every time. Writes go to a temp file that is renamed over the
+original, so a crash never leaves a half-written session.
+"""
+import json
+import os
+import tempfile
+import threading
+from cli.constants import SESSION_FILE
+
+_cache = {"stamp": None, "data": {}}
+_cache_lock = threading.Lock()  # the auto-sync thread reads it too
+
+
+def _stamp():
+    """(mtime, size) of the session file, or None if it doesn't exist."""
+    try:
+        stat = SESSION_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _refresh():
+    """Re-read the file into the cache if it changed on disk. Caller holds the lock."""
+    stamp = _stamp()
+    if stamp == _cache["stamp"]:
+        return
+    data = {}
+    if stamp is not None:
+        try:
+            data = json.loads(SESSION_FILE.read_text())
+        except (OSError, ValueError):
+            data = {}  # corrupt or vanished: treat as logged out
+    _cache.update(stamp=stamp, data=data if isinstance(data, dict) else {})
+
+
+def read_session():
+    """Return a copy of the session data ({} if there is none)."""
+    with _cache_lock:
+        _refresh()
+        return dict(_cache["data"])
+
+
+def get_session_value(key, default=None):
+    """Return one session value without copying the whole session."""
+    with _cache_lock:
+        _refresh()
+        return _cache["data"].get(key, default)
+
+
+def write_session(data):
+    """Atomically replace the session file with `data`."""
+    with _cache_lock:
+        fd, tmp_path = tempfile.mkstemp(prefix=".synqlikk_session.", dir=SESSION_FILE.parent)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, SESSION_FILE)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        _cache.update(stamp=_stamp(), data=dict(data))
+
+
+def update_session(values=None, remove=()):
+    """Merge `values` into the session, drop the keys in `remove`, and save it."""
+    data = read_session()
+    data.update(values or {})
+    for key in remove:
+        data.pop(key, None)
+    write_session(data)
+    return data
+
+
+def clear_session():
+    """Delete the session file and forget the cached copy."""
+    with _cache_lock:
+        try:
+            SESSION_FILE.unlink()
+        except FileNotFoundError:
+            pass
+        _cache.update(stamp=None, data={})
@@ -7,6 +7,7 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 DB_DIR = BASE_DIR / 'db'
 LOCAL_DB_PATH = DB_DIR / 'local_cache.db'
+SESSION_FILE = Path('.synqlikk_session.json')  # relative to the working directory
 
 # ==========================
 # Server API
@@ -21,3 +22,18 @@ SYNC_ENDPOINT = f'{SERVER_API_URL}/sync'
 # ==========================
 DEFAULT_TIMEOUT = 10  # seconds for API calls
 RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_BASE = 0.5  # seconds before the first retry, doubled per attempt
+RETRY_BACKOFF_MAX = 8  # cap on a single backoff delay, seconds
+SYNC_PAGE_SIZE = 500  # max items per pulled sync page
+PUSH_CHUNK_ITEMS = 500  # max items per pushed chunk
+PUSH_CHUNK_BYTES = 512 * 1024  # max uncompressed JSON bytes per pushed chunk
+OUTBOX_READ_BATCH = 500  # rows fetched per query when gathering outbox changes
+COMPRESS_MIN_BYTES = 1024  # sync request bodies above this are compressed
+# Background auto-sync (opt in with SYNQLIKK_AUTO_SYNC=1)
+AUTO_SYNC_INTERVAL = 60  # seconds between scheduled syncs
+AUTO_SYNC_JITTER = 0.2  # +/- fraction of the interval, so clients spread out
+AUTO_SYNC_DEBOUNCE = 3  # seconds without local writes before pushing them
+AUTO_SYNC_EXIT_TIMEOUT = 5  # seconds exit waits for the final flush
+LIST_PAGE_SIZE = 20  # rows per page in the list views
+IMPORT_BATCH_SIZE = 5000  # rows per executemany transaction in bulk imports
+SEARCH_LIMIT = 25  # max results shown by search
@@ -1,7 +1,9 @@
 # cli/expenses.py
 import uuid
-from tabulate import tabulate
-from cli.utils import get_db_connection, current_timestamp, print_warning
+from functools import partial
+from cli.constants import LIST_PAGE_SIZE
+from cli.utils import (keyset_page, browse_pages, get_db_connection, current_timestamp, print_warning,
+                       column_mask, record_change, FULL_ROW)
 from cli.auth import load_session
 
 TABLE = "expenses"
@@ -14,15 +16,8 @@ def _get_user_id():
         return None
     return user_id
 
-def view_expenses():
-    """
-    Views all expenses for the logged-in user, displays them in a numbered table,
-    and returns them as a list of dictionaries.
-    """
-    user_id = _get_user_id()
-    if not user_id:
-        return []
-
+def fetch_expenses(user_id):
+    """Return the user's expenses, newest date first, as a list of dicts."""
     conn = get_db_connection()
     cur = conn.cursor()
     cur.execute(f"""
@@ -31,38 +26,61 @@ def view_expenses():
         WHERE is_deleted=0 AND user_id=?
         ORDER BY date DESC
     """, (user_id,))
-    rows = cur.fetchall()
-    conn.close()
-
-    if not rows:
-        print("\nNo expenses found.")
-        return []
-
-    headers = ["#", "ID", "Amount", "Category", "Date", "Description"]
-    table_data = []
-    expenses = []
-
-    for i, row in enumerate(rows, 1):
-        exp_id, amount, category, description, date, last_modified = row
-        table_data.append([
-            i,
-            exp_id[:8],
-            f"{float(amount):.2f}",
-            category,
-            date,
-            description or ""
-        ])
-        expenses.append({
+    return [
+        {
             "id": exp_id,
             "amount": float(amount),
             "category": category,
             "description": description,
             "date": date,
             "last_modified": last_modified
-        })
+        }
+        for exp_id, amount, category, description, date, last_modified in cur.fetchall()
+    ]
+
+def create_expense(user_id, amount, category, date, description=""):
+    """Insert a new expense, marked for the next sync. Returns its ID."""
+    exp_id = str(uuid.uuid4())
+    ts = current_timestamp()
 
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        INSERT INTO {TABLE} (id, user_id, amount, category, description, date, last_modified, synced)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+    """, (exp_id, user_id, amount, category, description, date, ts))
+    record_change(conn, TABLE, exp_id, user_id, FULL_ROW)
+    conn.commit()
+    return exp_id
+
+def fetch_expenses_page(user_id, anchor=None, forward=True, limit=LIST_PAGE_SIZE):
+    """One window of expenses, newest date first (see keyset_page)."""
+    columns = ("id", "amount", "category", "description", "date", "last_modified")
+    return keyset_page(TABLE, columns, "date", user_id, anchor, forward, limit)
+
+def _render_expenses(expenses, first):
+    from tabulate import tabulate
+
+    headers = ["#", "ID", "Amount", "Category", "Date", "Description"]
+    table_data = [
+        [i, e["id"][:8], f"{float(e['amount']):.2f}", e["category"], e["date"], e["description"] or ""]
+        for i, e in enumerate(expenses, first)
+    ]
     print("\n" + tabulate(table_data, headers=headers, tablefmt="grid"))
-    return expenses
+
+def _browse_expenses(user_id, prompt=None):
+    """Page through expenses; with a prompt, return the expense picked by its #."""
+    return browse_pages(partial(fetch_expenses_page, user_id), _render_expenses, "date",
+                        prompt, "No expenses found.")
+
+def view_expenses():
+    """
+    Views the logged-in user's expenses a page at a time in a numbered table.
+    """
+    user_id = _get_user_id()
+    if not user_id:
+        return
+    _browse_expenses(user_id)
 
 def add_expense():
     """Adds a new expense to the local database for the logged-in user."""
@@ -84,17 +102,7 @@ def add_expense():
         print("\nError: Category and Date are required.")
         return
 
-    exp_id = str(uuid.uuid4())
-    ts = current_timestamp()
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(f"""
-        INSERT INTO {TABLE} (id, user_id, amount, category, description, date, last_modified, synced)
-        VALUES (?, ?, ?, ?, ?, ?, ?, 0)
-    """, (exp_id, user_id, amount, category, description, date, ts))
-    conn.commit()
-    conn.close()
+    create_expense(user_id, amount, category, date, description)
     print("\n✅ Expense added locally. Run 'Sync with Server' to upload it online.")
 
 def edit_expense():
@@ -103,17 +111,8 @@ def edit_expense():
     if not user_id:
         return
 
-    expenses = view_expenses()
-    if not expenses:
-        return
-
-    try:
-        choice = int(input("\nEnter the # of the Expense to edit: ").strip())
-        if not (1 <= choice <= len(expenses)):
-            raise ValueError
-        expense = expenses[choice - 1]
-    except (ValueError, IndexError):
-        print("\nError: Invalid selection.")
+    expense = _browse_expenses(user_id, "Enter the # of the Expense to edit")
+    if not expense:
         return
 
     print("\nEditing expense. Press Enter to keep the current value.")
@@ -122,6 +121,13 @@ def edit_expense():
     date = input(f"Date [{expense['date']}]: ").strip() or expense['date']
     description = input(f"Description [{expense.get('description', '')}]: ").strip() or expense.get('description', '')
 
+    # Only the columns that actually changed are pushed on the next sync
+    updated = {"amount": float(amount), "category": category, "date": date, "description": description}
+    changed = [column for column, value in updated.items() if value != expense[column]]
+    if not changed:
+        print("\nNo changes made.")
+        return
+
     ts = current_timestamp()
     conn = get_db_connection()
     cur = conn.cursor()
@@ -130,8 +136,8 @@ def edit_expense():
         SET amount=?, category=?, date=?, description=?, last_modified=?, synced=0
         WHERE id=? AND user_id=?
     """, (float(amount), category, date, description, ts, expense['id'], user_id))
+    record_change(conn, TABLE, expense['id'], user_id, column_mask(TABLE, changed))
     conn.commit()
-    conn.close()
     print("\n✅ Expense updated locally.")
 
 def delete_expense():
@@ -140,17 +146,8 @@ def delete_expense():
     if not user_id:
         return
 
-    expenses = view_expenses()
-    if not expenses:
-        return
-
-    try:
-        choice = int(input("\nEnter the # of the Expense to delete: ").strip())
-        if not (1 <= choice <= len(expenses)):
-            raise ValueError
-        expense_to_delete = expenses[choice - 1]
-    except (ValueError, IndexError):
-        print("\nError: Invalid selection.")
+    expense_to_delete = _browse_expenses(user_id, "Enter the # of the Expense to delete")
+    if not expense_to_delete:
         return
 
     ts = current_timestamp()
@@ -161,6 +158,6 @@ def delete_expense():
         SET is_deleted=1, deleted_at=?, last_modified=?, synced=0
         WHERE id=? AND user_id=?
     """, (ts, ts, expense_to_delete['id'], user_id))
+    record_change(conn, TABLE, expense_to_delete['id'], user_id, column_mask(TABLE, ["is_deleted", "deleted_at"]))
     conn.commit()
-    conn.close()
     print("\n✅ Expense marked for deletion. It will be removed on the next sync.")
@@ -0,0 +1,45 @@
+# cli/http_client.py
+"""
+One keep-alive HTTP session shared by every API call (login, register,
+sync chunks and pages), so the TCP and TLS handshakes are paid once per
+process instead of once per request. requests is imported on first use.
+"""
+import atexit
+import threading
+
+POOL_SIZE = 4  # the foreground and background sync share the session
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide requests.Session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                atexit.register(close_session)
+                _session = session
+    return _session
+
+
+def post(url, **kwargs):
+    """requests.post over the shared session."""
+    return get_session().post(url, **kwargs)
+
+
+def close_session():
+    """Close pooled connections (registered to run at exit)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,185 @@
+# cli/importer.py
+"""
+Bulk import of tasks, notes and expenses from CSV or JSONL files.
+
+Rows are read one at a time, normalized, and written to local_cache.db
+with executemany in batches of IMPORT_BATCH_SIZE, one transaction per
+batch. Imported rows are marked for the next sync push.
+
+CSV files need a header row; JSONL files hold one JSON object per line.
+Columns are the table's own (see SYNC_COLUMNS in cli/utils.py); an `id`
+column is kept when it is a valid UUID, and rows whose ID already exists
+locally are skipped, so re-importing a file with IDs is safe.
+"""
+import csv
+import json
+import sys
+import time
+import uuid
+from datetime import datetime
+from cli.constants import IMPORT_BATCH_SIZE
+from cli.utils import get_db_connection, current_timestamp, FULL_ROW
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+PRIORITIES = {"1": 1, "high": 1, "2": 2, "medium": 2, "normal": 2, "3": 3, "low": 3}
+STATUSES = {
+    "pending": "pending", "todo": "pending", "open": "pending",
+    "in_progress": "in_progress", "in progress": "in_progress", "doing": "in_progress",
+    "completed": "completed", "complete": "completed", "done": "completed",
+}
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S")
+
+# Columns written per table, after id and user_id
+IMPORT_COLUMNS = {
+    "tasks": ("title", "description", "due_date", "priority", "status"),
+    "notes": ("content",),
+    "expenses": ("amount", "category", "description", "date"),
+}
+
+
+# ==========================
+# Normalization
+# ==========================
+def _text(row, key, required=False):
+    value = row.get(key)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f"'{key}' is required")
+    return value
+
+def _date(row, key, required=False):
+    value = _text(row, key, required)
+    if not value:
+        return ""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"'{key}' is not a date: {value!r}")
+
+def _uuid(row):
+    value = _text(row, "id")
+    if not value:
+        return str(uuid.uuid4())
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        raise ValueError(f"'id' is not a UUID: {value!r}")
+
+def normalize_task(row):
+    priority = _text(row, "priority").lower() or "2"
+    if priority not in PRIORITIES:
+        raise ValueError(f"'priority' must be 1-3 or high/medium/low: {priority!r}")
+    status = _text(row, "status").lower() or "pending"
+    if status not in STATUSES:
+        raise ValueError(f"unknown 'status': {status!r}")
+    return (_text(row, "title", required=True), _text(row, "description"), _date(row, "due_date"),
+            PRIORITIES[priority], STATUSES[status])
+
+def normalize_note(row):
+    return (_text(row, "content", required=True),)
+
+def normalize_expense(row):
+    raw_amount = _text(row, "amount", required=True)
+    try:
+        amount = float(raw_amount.replace(",", "").lstrip("$€£"))
+    except ValueError:
+        raise ValueError(f"'amount' is not a number: {raw_amount!r}")
+    return (amount, _text(row, "category", required=True), _text(row, "description"),
+            _date(row, "date", required=True))
+
+NORMALIZERS = {"tasks": normalize_task, "notes": normalize_note, "expenses": normalize_expense}
+
+
+# ==========================
+# Reading
+# ==========================
+def detect_format(path):
+    """Return 'csv' or 'jsonl' from the file extension. Raises ValueError if unknown."""
+    suffix = path.suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Cannot tell the format of {path.name}; pass --format csv or jsonl.")
+    return FORMATS[suffix]
+
+def read_rows(path, fmt):
+    """Yield (line_number, dict) for each record in the file."""
+    # utf-8-sig drops the BOM spreadsheet exports often start with
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield line_number, None
+                    continue
+                yield line_number, row if isinstance(row, dict) else None
+
+
+# ==========================
+# Import
+# ==========================
+def import_file(user_id, table, path, fmt=None, batch_size=IMPORT_BATCH_SIZE, progress=True):
+    """
+    Import every valid row of `path` into `table` for user_id.
+    Returns stats: read, imported, duplicates, invalid, errors (first 10
+    "line N: reason" messages), seconds.
+    """
+    fmt = fmt or detect_format(path)
+    normalize = NORMALIZERS[table]
+    columns = ("id", "user_id") + IMPORT_COLUMNS[table] + ("last_modified", "synced")
+    sql = (f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+           f"VALUES ({', '.join(['?'] * len(columns))})")
+    # Journal the rows this import inserted; skipped duplicates are left alone
+    journal_sql = (f"INSERT INTO sync_outbox (table_name, row_id, user_id, mask) "
+                   f"SELECT '{table}', id, user_id, {FULL_ROW} FROM {table} "
+                   f"WHERE id = ? AND last_modified = ? AND synced = 0")
+
+    stats = {"read": 0, "imported": 0, "duplicates": 0, "invalid": 0, "errors": []}
+    conn = get_db_connection()
+    ts = current_timestamp()
+    started = time.perf_counter()
+    batch = []
+
+    def flush():
+        with conn:
+            # rowcount leaves out the rows triggers write (e.g. the search index)
+            inserted = conn.executemany(sql, batch).rowcount
+            if inserted:
+                conn.executemany(journal_sql, [(row[0], ts) for row in batch])
+        stats["imported"] += inserted
+        stats["duplicates"] += len(batch) - inserted
+        batch.clear()
+        if progress:
+            rate = stats["read"] / max(time.perf_counter() - started, 1e-9)
+            print(f"\r   Imported {stats['imported']:,} of {stats['read']:,} rows ({rate:,.0f} rows/s)",
+                  end="", file=sys.stderr, flush=True)
+
+    for line_number, row in read_rows(path, fmt):
+        stats["read"] += 1
+        try:
+            if row is None:
+                raise ValueError("not a JSON object")
+            values = normalize(row)
+            item_id = _uuid(row)
+        except ValueError as e:
+            stats["invalid"] += 1
+            if len(stats["errors"]) < 10:
+                stats["errors"].append(f"line {line_number}: {e}")
+            continue
+        batch.append((item_id, user_id) + values + (ts, 0))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    if progress:
+        print(file=sys.stderr)
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
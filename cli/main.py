@@ -1,20 +1,35 @@
 # cli/main.py
 import sys
-from colorama import init, Fore
-from cli import menus, tasks, notes, expenses, sync, utils
-from cli.auth import login, register, is_authenticated, clear_session
 
-init(autoreset=True)
+# Heavy modules (colorama, requests, tabulate) are imported inside the
+# functions that use them, so subcommands start without paying for them.
+
+def sync_before_exit(message):
+    """Sync before exiting; with auto-sync on, only wait for its final flush."""
+    from colorama import Fore
+    from cli import autosync, sync
+
+    print(Fore.GREEN + message)
+    if autosync.is_running():
+        if not autosync.stop():
+            print(Fore.YELLOW + "⚠️ Final sync still running; remaining changes will sync next time.")
+    else:
+        sync.sync_all()
 
 def main_menu():
     """Display main menu after login."""
+    from colorama import Fore
+    from cli import menus, search, sync
+    from cli.auth import is_authenticated, clear_session
+
     while True:
         print(Fore.CYAN + "\n=== SynQlikk Main Menu ===")
         print("1. Tasks")
         print("2. Notes")
         print("3. Expenses")
-        print("4. Sync with Server")
-        print("5. Logout / Exit")
+        print("4. Search")
+        print("5. Sync with Server")
+        print("6. Logout / Exit")
 
         choice = input(Fore.YELLOW + "Select an option: ").strip()
 
@@ -25,12 +40,13 @@ def main_menu():
         elif choice == "3":
             menus.expenses_menu()
         elif choice == "4":
+            search.search_prompt()
+        elif choice == "5":
             print(Fore.GREEN + "🔄 Syncing with server...")
             sync.sync_all()
-        elif choice == "5":
+        elif choice == "6":
             if is_authenticated():
-                print(Fore.GREEN + "🔄 Syncing final changes before logout...")
-                sync.sync_all()
+                sync_before_exit("🔄 Syncing final changes before logout...")
             print(Fore.RED + "🚪 Logging out...")
             clear_session()
             sys.exit(0)
@@ -39,6 +55,9 @@ def main_menu():
 
 def auth_menu():
     """Display login/register menu."""
+    from colorama import Fore
+    from cli.auth import login, register
+
     while True:
         print(Fore.MAGENTA + "\n=== SynQlikk Authentication ===")
         print("1. Login")
@@ -69,27 +88,48 @@ def auth_menu():
         else:
             print(Fore.RED + "❌ Invalid choice!")
 
-if __name__ == "__main__":
-    # --- NEW UPDATE ---
+def interactive():
+    """Run the interactive menus, syncing on start and on exit."""
+    from colorama import init, Fore
+    from cli import autosync, sync, utils
+    from cli.auth import is_authenticated
+
+    init(autoreset=True)
+
     # Initialize the local DB once at the start
     utils.initialize_local_db()
 
     try:
         if is_authenticated():
-            print(Fore.CYAN + "🔄 Syncing all server records to local DB...")
-            sync.sync_all(force_full=True)  # Full sync even if session exists
-            main_menu()
+            # Delta pulls are exact (server change sequence), so no full
+            # hydration is needed when a session already exists
+            print(Fore.CYAN + "🔄 Syncing with server...")
+            sync.sync_all()
         else:
             auth_menu()
-            main_menu()
+        if autosync.start():
+            print(Fore.CYAN + "🔁 Auto-sync is on: changes sync in the background.")
+        main_menu()
     except KeyboardInterrupt:
         # Handle Ctrl+C exit
         print(Fore.YELLOW + "\n\n⚡ Exit detected (Ctrl+C).")
         if is_authenticated():
-            print(Fore.GREEN + "🔄 Syncing final changes before exit...")
-            sync.sync_all()
+            sync_before_exit("🔄 Syncing final changes before exit...")
         print(Fore.CYAN + "Goodbye!")
         sys.exit(0)
     except Exception as e:
         print(Fore.RED + f"\nAn unexpected error occurred: {e}")
         sys.exit(1)
+
+
+def main(argv=None):
+    """Dispatch to a subcommand (see cli/commands.py) or the interactive menus."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        from cli.commands import run
+        sys.exit(run(argv))
+    interactive()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 # cli/notes.py
 import uuid
-from tabulate import tabulate
-from cli.utils import get_db_connection, current_timestamp, print_warning
+from functools import partial
+from cli.constants import LIST_PAGE_SIZE
+from cli.utils import (keyset_page, browse_pages, get_db_connection, current_timestamp, print_warning,
+                       column_mask, record_change, FULL_ROW)
 from cli.auth import load_session
 
 TABLE = "notes"
@@ -14,15 +16,8 @@ def _get_user_id():
         return None
     return user_id
 
-def view_notes():
-    """
-    Views all notes for the logged-in user, displays them in a numbered table,
-    and returns them as a list of dictionaries.
-    """
-    user_id = _get_user_id()
-    if not user_id:
-        return []
-
+def fetch_notes(user_id):
+    """Return the user's notes, most recently modified first, as a list of dicts."""
     conn = get_db_connection()
     cur = conn.cursor()
     cur.execute(f"""
@@ -31,29 +26,55 @@ def view_notes():
         WHERE is_deleted=0 AND user_id=?
         ORDER BY last_modified DESC
     """, (user_id,))
-    rows = cur.fetchall()
-    conn.close()
+    return [
+        {"id": note_id, "content": content, "last_modified": last_modified}
+        for note_id, content, last_modified in cur.fetchall()
+    ]
 
-    if not rows:
-        print("\nNo notes found.")
-        return []
+def create_note(user_id, content):
+    """Insert a new note, marked for the next sync. Returns its ID."""
+    note_id = str(uuid.uuid4())
+    ts = current_timestamp()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        INSERT INTO {TABLE} (id, user_id, content, last_modified, synced)
+        VALUES (?, ?, ?, ?, 0)
+    """, (note_id, user_id, content, ts))
+    record_change(conn, TABLE, note_id, user_id, FULL_ROW)
+    conn.commit()
+    return note_id
+
+def fetch_notes_page(user_id, anchor=None, forward=True, limit=LIST_PAGE_SIZE):
+    """One window of notes, most recently modified first (see keyset_page)."""
+    return keyset_page(TABLE, ("id", "content", "last_modified"), "last_modified", user_id, anchor, forward, limit)
+
+def _render_notes(notes, first):
+    from tabulate import tabulate
 
     headers = ["#", "ID", "Content", "Last Modified"]
     table_data = []
-    notes = []
-
-    for i, row in enumerate(rows, 1):
-        note_id, content, last_modified = row
+    for i, note in enumerate(notes, first):
+        content = note["content"]
         content_preview = (content[:60] + "...") if len(content) > 60 else content
-        table_data.append([i, note_id[:8], content_preview, last_modified])
-        notes.append({
-            "id": note_id,
-            "content": content,
-            "last_modified": last_modified
-        })
+        table_data.append([i, note["id"][:8], content_preview, note["last_modified"]])
 
     print("\n" + tabulate(table_data, headers=headers, tablefmt="grid"))
-    return notes
+
+def _browse_notes(user_id, prompt=None):
+    """Page through notes; with a prompt, return the note picked by its #."""
+    return browse_pages(partial(fetch_notes_page, user_id), _render_notes, "last_modified",
+                        prompt, "No notes found.")
+
+def view_notes():
+    """
+    Views the logged-in user's notes a page at a time in a numbered table.
+    """
+    user_id = _get_user_id()
+    if not user_id:
+        return
+    _browse_notes(user_id)
 
 def add_note():
     """Adds a new note to the local database for the logged-in user."""
@@ -66,17 +87,7 @@ def add_note():
         print("\nError: Content cannot be empty.")
         return
 
-    note_id = str(uuid.uuid4())
-    ts = current_timestamp()
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(f"""
-        INSERT INTO {TABLE} (id, user_id, content, last_modified, synced)
-        VALUES (?, ?, ?, ?, 0)
-    """, (note_id, user_id, content, ts))
-    conn.commit()
-    conn.close()
+    create_note(user_id, content)
     print("\n✅ Note added locally. Run 'Sync with Server' to save it online.")
 
 def edit_note():
@@ -85,21 +96,15 @@ def edit_note():
     if not user_id:
         return
 
-    notes = view_notes()
-    if not notes:
-        return
-
-    try:
-        choice = int(input("\nEnter the # of the Note to edit: ").strip())
-        if not (1 <= choice <= len(notes)):
-            raise ValueError
-        note = notes[choice - 1]
-    except (ValueError, IndexError):
-        print("\nError: Invalid selection.")
+    note = _browse_notes(user_id, "Enter the # of the Note to edit")
+    if not note:
         return
 
     print("\nEditing note. Press Enter to keep the current value.")
     content = input(f"Content [{note['content']}]: ").strip() or note['content']
+    if content == note['content']:
+        print("\nNo changes made.")
+        return
 
     ts = current_timestamp()
     conn = get_db_connection()
@@ -108,8 +113,8 @@ def edit_note():
         UPDATE {TABLE} SET content=?, last_modified=?, synced=0
         WHERE id=? AND user_id=?
     """, (content, ts, note['id'], user_id))
+    record_change(conn, TABLE, note['id'], user_id, column_mask(TABLE, ["content"]))
     conn.commit()
-    conn.close()
     print("\n✅ Note updated locally.")
 
 def delete_note():
@@ -118,17 +123,8 @@ def delete_note():
     if not user_id:
         return
 
-    notes = view_notes()
-    if not notes:
-        return
-
-    try:
-        choice = int(input("\nEnter the # of the Note to delete: ").strip())
-        if not (1 <= choice <= len(notes)):
-            raise ValueError
-        note_to_delete = notes[choice - 1]
-    except (ValueError, IndexError):
-        print("\nError: Invalid selection.")
+    note_to_delete = _browse_notes(user_id, "Enter the # of the Note to delete")
+    if not note_to_delete:
         return
 
     ts = current_timestamp()
@@ -139,6 +135,6 @@ def delete_note():
         SET is_deleted=1, deleted_at=?, last_modified=?, synced=0
         WHERE id=? AND user_id=?
     """, (ts, ts, note_to_delete['id'], user_id))
+    record_change(conn, TABLE, note_to_delete['id'], user_id, column_mask(TABLE, ["is_deleted", "deleted_at"]))
     conn.commit()
-    conn.close()
     print("\n✅ Note marked for deletion. It will be removed on the next sync.")
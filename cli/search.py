@@ -0,0 +1,98 @@
+# cli/search.py
+"""
+Offline full-text search over local_cache.db.
+
+Uses the FTS5 indexes from db/migrations.py, which triggers keep current
+as rows are added, edited, deleted or pulled by a sync. Results from
+tasks, notes and expenses are merged by bm25 rank and shown with the
+matching words highlighted. Without FTS5 it falls back to LIKE.
+"""
+import time
+from cli.constants import SEARCH_LIMIT
+from cli.utils import get_db_connection, print_warning
+from cli.auth import load_session
+from db.migrations import SEARCH_COLUMNS
+from db.search import fts_query, has_fts, like_clause, rank_expression
+
+TABLES = ("tasks", "notes", "expenses")
+KINDS = {"tasks": "task", "notes": "note", "expenses": "expense"}
+
+# What identifies a hit in each table, next to its snippet
+LABELS = {
+    "tasks": "t.title",
+    "notes": "t.last_modified",
+    "expenses": "printf('%.2f %s on %s', t.amount, t.category, t.date)",
+}
+SNIPPET_WORDS = 12
+
+
+def _fts_select(table):
+    return f"""
+        SELECT '{KINDS[table]}' AS kind, t.id AS id, {LABELS[table]} AS label,
+               snippet({table}_fts, -1, ?, ?, '…', {SNIPPET_WORDS}) AS snippet,
+               {rank_expression(table)} AS rank
+        FROM {table}_fts JOIN {table} t ON t.id = {table}_fts.id
+        WHERE {table}_fts MATCH ? AND t.user_id = ? AND t.is_deleted = 0
+    """
+
+
+def _like_select(table, term):
+    condition, params = like_clause(table, term, alias="t")
+    text = " || ' ' || ".join(f"coalesce(t.{column}, '')" for column in SEARCH_COLUMNS[table])
+    return f"""
+        SELECT '{KINDS[table]}' AS kind, t.id AS id, {LABELS[table]} AS label,
+               substr({text}, 1, 80) AS snippet, 0 AS rank
+        FROM {table} t
+        WHERE {condition} AND t.user_id = ? AND t.is_deleted = 0
+    """, params
+
+
+def search(user_id, term, tables=TABLES, limit=SEARCH_LIMIT, highlight=("[", "]")):
+    """
+    Return up to `limit` matches for `term` across `tables`, best first, as
+    dicts with kind, id, label and snippet. Matched words in snippets are
+    wrapped in the `highlight` pair.
+    """
+    conn = get_db_connection()
+    match = fts_query(term)
+    selects, params = [], []
+    for table in tables:
+        if has_fts(conn, table):
+            if not match:
+                continue  # no words to look for
+            selects.append(_fts_select(table))
+            params += [highlight[0], highlight[1], match, user_id]
+        else:
+            sql, like_params = _like_select(table, term)
+            selects.append(sql)
+            params += like_params + [user_id]
+    if not selects:
+        return []
+    query = " UNION ALL ".join(selects) + " ORDER BY rank LIMIT ?"
+    rows = conn.execute(query, params + [limit]).fetchall()
+    return [{"kind": r["kind"], "id": r["id"], "label": r["label"], "snippet": r["snippet"]} for r in rows]
+
+
+def search_prompt():
+    """Interactive search: ask for a term and print ranked, highlighted hits."""
+    from colorama import Fore, Style
+    from tabulate import tabulate
+
+    _, user_id = load_session()
+    if not user_id:
+        print_warning("⚠️ You must log in before performing this action.")
+        return
+
+    term = input("🔍 Search for: ").strip()
+    if not term:
+        return
+    started = time.perf_counter()
+    results = search(user_id, term, highlight=(Fore.YELLOW + Style.BRIGHT, Style.RESET_ALL))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not results:
+        print(f"\nNo matches for '{term}'.")
+        return
+    table_data = [[r["kind"], r["id"][:8], r["label"], r["snippet"]] for r in results]
+    print(tabulate(table_data, headers=["Type", "ID", "Item", "Match"], tablefmt="grid"))
+    print(f"{len(results)} results in {elapsed_ms:.1f} ms")
@@ -1,29 +1,317 @@
 import requests
 import json
-from pathlib import Path  # ✅ FIXED
-from .constants import SYNC_ENDPOINT, DEFAULT_TIMEOUT
-from .auth import get_auth_headers, load_session, save_session
-from .utils import get_db_connection, current_timestamp
+import random
+import threading
+import time
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from .constants import (SYNC_ENDPOINT, DEFAULT_TIMEOUT, SYNC_PAGE_SIZE, COMPRESS_MIN_BYTES,
+                        RETRY_ATTEMPTS, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX,
+                        PUSH_CHUNK_ITEMS, PUSH_CHUNK_BYTES, OUTBOX_READ_BATCH)
+from .auth import get_auth_headers, load_session
+from . import config, http_client
+from .utils import (get_db_connection, current_timestamp, encode_json_body, decode_body, response_accept_encoding,
+                    SYNC_COLUMNS, dirty_columns, merge_masks)
 from .exceptions import APIError
 
 TABLES = ["tasks", "notes", "expenses"]
-SESSION_FILE = Path(".synqlikk_session.json")
 
+# Held for the whole of a sync, so foreground and background syncs never overlap
+_sync_lock = threading.Lock()
 
-def sync_all(force_full: bool = False):
+# Request encodings the server advertised in its last response
+_server_encodings = ("gzip",)
+
+# Failures worth retrying: the request may succeed a moment later
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _post_sync(payload, headers, transfer):
+    """
+    POST one sync request with a compressed body and return the decoded JSON.
+    transfer accumulates 'raw' (uncompressed) and 'wire' byte counts.
+    """
+    global _server_encodings
+    body, body_headers, raw_size = encode_json_body(payload, _server_encodings, COMPRESS_MIN_BYTES)
+    response = _send(body, {**headers, **body_headers})
+    if response.status_code == 415 and 'Content-Encoding' in body_headers:
+        # The server cannot decode our encoding; resend as plain JSON
+        response.close()
+        _server_encodings = ()
+        body, body_headers, raw_size = encode_json_body(payload, _server_encodings)
+        response = _send(body, {**headers, **body_headers})
+    with response:
+        response.raise_for_status()
+        if response.headers.get('Accept-Encoding'):
+            _server_encodings = tuple(e.strip() for e in response.headers['Accept-Encoding'].split(','))
+        wire = _read_encoded(response)
+    try:
+        data = decode_body(wire, response.headers.get('Content-Encoding'))
+    except ValueError as e:
+        raise requests.exceptions.ContentDecodingError(e, response=response)
+    transfer['raw'] += raw_size + len(data)
+    transfer['wire'] += len(body) + len(wire)
+    return json.loads(data)
+
+
+def _read_encoded(response):
+    """
+    Read a response body as it came over the wire, before decoding. Streamed
+    pages come chunked with no Content-Length, so this is the only way to
+    know their compressed size. urllib3 errors are raised as their requests
+    equivalents so the retry logic still sees them.
+    """
+    try:
+        return response.raw.read(decode_content=False)
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.ConnectionError(e)
+
+
+def _send(body, headers):
+    """POST a sync body, leaving the response body unread and undecoded."""
+    headers = {**headers, 'Accept-Encoding': response_accept_encoding()}
+    return http_client.post(SYNC_ENDPOINT, data=body, headers=headers, timeout=DEFAULT_TIMEOUT, stream=True)
+
+
+def _is_retryable(error):
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in RETRYABLE_STATUS
+
+
+def _post_sync_with_retry(payload, headers, transfer, log):
+    """
+    _post_sync, retried up to RETRY_ATTEMPTS times on network errors and
+    429/5xx responses, with exponential backoff and jitter between tries.
+    """
+    for attempt in range(RETRY_ATTEMPTS + 1):
+        try:
+            return _post_sync(payload, headers, transfer)
+        except requests.RequestException as e:
+            if attempt == RETRY_ATTEMPTS or not _is_retryable(e):
+                raise
+            delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+            log(f"   ⚠️ {e}; retrying in {delay:.1f}s ({attempt + 1}/{RETRY_ATTEMPTS})...")
+            time.sleep(delay)
+
+
+def _push_chunks(changes):
+    """
+    Split {table: [items]} into chunks of at most PUSH_CHUNK_ITEMS items and
+    about PUSH_CHUNK_BYTES of JSON. Always returns at least one (maybe empty) chunk.
+    """
+    chunks = []
+    chunk, count, size = {table: [] for table in TABLES}, 0, 0
+    for table in TABLES:
+        for item in changes[table]:
+            item_size = len(json.dumps(item))
+            if count and (count >= PUSH_CHUNK_ITEMS or size + item_size > PUSH_CHUNK_BYTES):
+                chunks.append(chunk)
+                chunk, count, size = {table: [] for table in TABLES}, 0, 0
+            chunk[table].append(item)
+            count += 1
+            size += item_size
+    chunks.append(chunk)
+    return chunks
+
+
+def _push_item(table, row, mask):
+    """Build the pushed form of a local row: its identity plus the edited columns."""
+    item = {'id': row['id'], 'last_modified': row['last_modified']}
+    for column in dirty_columns(table, mask):
+        item[column] = row[column]
+    return item
+
+
+def _gather_changes(conn, user_id):
+    """
+    Read the outbox and coalesce it into one pushed item per edited row,
+    with the union of the columns its writes touched.
+    Returns (changes, last_op): entries after last_op were appended while
+    we read and are left for the next sync.
+    """
+    masks = {table: {} for table in TABLES}
+    last_op = 0
+    for op_id, table, row_id, mask in conn.execute(
+        "SELECT op_id, table_name, row_id, mask FROM sync_outbox WHERE user_id = ? ORDER BY op_id",
+        (user_id,)
+    ):
+        masks[table][row_id] = merge_masks(masks[table].get(row_id, 0), mask)
+        last_op = op_id
+
+    changes = {table: [] for table in TABLES}
+    for table, row_masks in masks.items():
+        ids = list(row_masks)
+        for start in range(0, len(ids), OUTBOX_READ_BATCH):
+            batch = ids[start:start + OUTBOX_READ_BATCH]
+            rows = conn.execute(
+                f"SELECT * FROM {table} WHERE id IN ({', '.join(['?'] * len(batch))})", batch
+            )
+            changes[table].extend(_push_item(table, row, row_masks[row['id']]) for row in rows)
+    return changes, last_op
+
+
+def _begin_write(conn):
+    """
+    Take the write lock now if no transaction is open, so local writes from
+    the menu (another connection) cannot land between reading the outbox
+    and applying server rows.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+
+def _pending_masks(conn, table, ids):
+    """Merged outbox masks of the rows among ids that still have local edits to push."""
+    masks = {}
+    for start in range(0, len(ids), OUTBOX_READ_BATCH):
+        batch = ids[start:start + OUTBOX_READ_BATCH]
+        for row_id, mask in conn.execute(
+            f"SELECT row_id, mask FROM sync_outbox WHERE table_name = ? AND row_id IN ({', '.join(['?'] * len(batch))})",
+            [table] + batch
+        ):
+            masks[row_id] = merge_masks(masks.get(row_id, 0), mask)
+    return masks
+
+
+def _apply_page(conn, server_data):
+    """
+    Write one page of server items into the local DB. Returns the row count.
+    Items carrying every synced column are upserted; delta items carry only
+    changed columns and update the row in place. Items are grouped by table
+    and column set so each group is a single executemany.
+
+    Rows still listed in the outbox (edited after the sync gathered them,
+    or never pushed) keep their local edits: only the other columns are
+    written, last_modified is left alone and the row stays unsynced.
+    """
+    _begin_write(conn)
+    has_pending = conn.execute("SELECT 1 FROM sync_outbox LIMIT 1").fetchone() is not None
+    upserts, updates, held = {}, {}, {}
+    items_pulled = 0
+    for table in TABLES:
+        full = set(SYNC_COLUMNS[table])
+        items = server_data.get(table, [])
+        pending = _pending_masks(conn, table, [item['id'] for item in items]) if has_pending else {}
+        for item in items:
+            items_pulled += 1
+            if item['id'] in pending:
+                mask = pending[item['id']]
+                if mask < 0:
+                    continue  # the whole row is still a local edit
+                kept = set(dirty_columns(table, mask)) | {'id', 'last_modified'}
+                columns = tuple(column for column in item if column not in kept)
+                if columns:
+                    held.setdefault((table, columns), []).append(
+                        tuple(item[column] for column in columns) + (item['id'],)
+                    )
+            elif full <= item.keys():
+                upserts.setdefault((table, tuple(item)), []).append(tuple(item.values()))
+            else:
+                columns = tuple(column for column in item if column != 'id')
+                updates.setdefault((table, columns), []).append(
+                    tuple(item[column] for column in columns) + (item['id'],)
+                )
+
+    for (table, columns), rows in upserts.items():
+        assignments = ', '.join(f"{column} = excluded.{column}" for column in columns if column != 'id')
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}, synced) "
+            f"VALUES ({', '.join(['?'] * len(columns))}, 1) "
+            f"ON CONFLICT(id) DO UPDATE SET {assignments}, synced = 1",
+            rows
+        )
+    for (table, columns), rows in updates.items():
+        assignments = ', '.join(f"{column} = ?" for column in columns)
+        conn.executemany(
+            f"UPDATE {table} SET {assignments}, synced = 1 WHERE id = ?",
+            rows
+        )
+    for (table, columns), rows in held.items():
+        assignments = ', '.join(f"{column} = ?" for column in columns)
+        conn.executemany(f"UPDATE {table} SET {assignments} WHERE id = ?", rows)
+    return items_pulled
+
+
+def _apply_conflicts(conn, conflicts):
+    """
+    Overwrite local rows with the server's merged version of every pushed
+    item that lost a column. They are full rows, so rows _mark_pushed just
+    purged (a losing local delete) come back too.
+    """
+    page = {table: [] for table in TABLES}
+    for item in conflicts:
+        item = dict(item)
+        table = item.pop('table', None)
+        if table in page:
+            page[table].append(item)
+    return _apply_page(conn, page)
+
+
+def _mark_pushed(conn, payload, last_op):
+    """
+    Settle the rows we just pushed: drop their outbox entries up to last_op,
+    mark them synced and purge pushed deletions. Rows edited again since
+    they were gathered keep their newer entries and synced = 0.
+    """
+    _begin_write(conn)
+    for table in TABLES:
+        rows = payload.get(table, [])
+        conn.executemany(
+            "DELETE FROM sync_outbox WHERE table_name = ? AND row_id = ? AND op_id <= ?",
+            [(table, row['id'], last_op) for row in rows]
+        )
+        conn.executemany(
+            f"UPDATE {table} SET synced = 1 WHERE id = ? AND last_modified = ? AND is_deleted = 0",
+            [(row['id'], row['last_modified']) for row in rows if not row.get('is_deleted')]
+        )
+        conn.executemany(
+            f"DELETE FROM {table} WHERE id = ? AND last_modified = ? AND is_deleted = 1",
+            [(row['id'], row['last_modified']) for row in rows if row.get('is_deleted')]
+        )
+
+
+def sync_all(force_full: bool = False, conn=None, quiet: bool = False, blocking: bool = True):
     """
     Performs a full two-way sync:
-    1. Gathers local changes.
+    1. Gathers local changes from the outbox (only the edited columns of each row).
     2. Pushes them to server.
-    3. Applies server updates locally.
-    4. Resolves conflicts.
+    3. Applies server updates locally, one page at a time.
+    4. Resolves conflicts: items that lost a column to a server edit are
+       overwritten with the server's merged row.
+
+    Each pulled page is committed before the next is requested and its
+    continuation cursor is saved in the session file, so an interrupted
+    sync resumes from the last committed page.
 
     If force_full=True, performs a full pull of all server records to local DB.
+
+    One sync runs at a time per process. The background worker in
+    cli/autosync.py passes its own connection, quiet=True to keep the menu
+    clean, and blocking=False to skip a round while another sync runs.
+    Returns True if the sync completed.
     """
+    if not _sync_lock.acquire(blocking=blocking):
+        return False
+    try:
+        return _sync(force_full, conn, print if not quiet else _silent)
+    finally:
+        _sync_lock.release()
+
+
+def _silent(*args, **kwargs):
+    pass
+
+
+def _sync(force_full, conn, log):
+    """Body of sync_all, run under _sync_lock; log is print or _silent."""
     if force_full:
-        print("\n🔄 Pulling all server data (full sync)...")
+        log("\n🔄 Pulling all server data (full sync)...")
     else:
-        print("\n🔄 Starting two-way sync...")
+        log("\n🔄 Starting two-way sync...")
 
     try:
         headers = get_auth_headers()
@@ -31,79 +319,93 @@ def sync_all(force_full: bool = False):
         if not user_id:
             raise APIError("Could not find user_id in session.")
     except Exception as e:
-        print(f"❌ Sync failed: {e}")
-        return
-
-    conn = get_db_connection()
+        log(f"❌ Sync failed: {e}")
+        return False
 
-    # --- 1. GATHER LOCAL CHANGES ---
-    payload = {table: [] for table in TABLES}
+    conn = conn or get_db_connection()
 
+    # --- 1. GATHER LOCAL CHANGES FROM THE OUTBOX ---
+    changes, last_op = {table: [] for table in TABLES}, 0
     if not force_full:
-        for table in TABLES:
-            local_changes = conn.execute(
-                f"SELECT * FROM {table} WHERE user_id = ? AND synced = 0",
-                (user_id,)
-            ).fetchall()
-            if local_changes:
-                payload[table] = [dict(row) for row in local_changes]
-
-    # Safely read last sync time
-    if SESSION_FILE.exists():
-        try:
-            session_data = json.loads(SESSION_FILE.read_text())
-            payload['last_sync_time'] = None if force_full else session_data.get('last_sync_time')
-        except json.JSONDecodeError:
-            session_data = {}
-            payload['last_sync_time'] = None
-    else:
-        session_data = {}
-        payload['last_sync_time'] = None
+        changes, last_op = _gather_changes(conn, user_id)
+
+    # Safely read the last synced change sequence, and the cursor of an
+    # interrupted pull
+    session_data = config.read_session()
+    since = None if force_full else session_data.get('last_sync_seq')
+    pull = {'last_sync_seq': since, 'page_size': SYNC_PAGE_SIZE, 'stream': True}
+    if session_data.get('sync_cursor') and session_data.get('sync_cursor_since') == since:
+        pull['cursor'] = session_data['sync_cursor']
+        log("   Resuming interrupted sync...")
 
+    chunks = _push_chunks(changes)
+    total = sum(len(items) for items in changes.values())
     if not force_full:
-        print(f"   Pushing {len(payload['tasks'])} tasks, "
-              f"{len(payload['notes'])} notes, "
-              f"{len(payload['expenses'])} expenses...")
+        log(f"   Pushing {len(changes['tasks'])} tasks, "
+            f"{len(changes['notes'])} notes, "
+            f"{len(changes['expenses'])} expenses"
+            + (f" in {len(chunks)} chunks..." if len(chunks) > 1 else "..."))
 
-    # --- 2. PUSH TO SERVER & PULL RESPONSE ---
-    try:
-        response = requests.post(SYNC_ENDPOINT, json=payload, headers=headers, timeout=DEFAULT_TIMEOUT)
-        response.raise_for_status()
-        server_data = response.json()
-        print("   ✅ Connected to the server.")
-    except Exception as e:
-        print(f"❌ Sync failed. Could not connect to the server: {e}")
-        conn.close()
-        return
+    # --- 2. PUSH IN CHUNKS; THE LAST ONE ALSO PULLS THE FIRST PAGE ---
+    # Each acknowledged chunk is settled at once, so a failure costs only
+    # the chunk in flight; the rest stays unsynced for the next sync.
+    transfer = {'raw': 0, 'wire': 0}
+    conflicts = pushed = 0
+    for index, chunk in enumerate(chunks):
+        is_last = index == len(chunks) - 1
+        try:
+            request = pull if is_last else {'last_sync_seq': since, 'pull': False}
+            server_data = _post_sync_with_retry(dict(chunk, **request), headers, transfer, log)
+        except Exception as e:
+            if pushed:
+                log(f"   Pushed {pushed} of {total} items; the rest will go on the next sync.")
+            log(f"❌ Sync failed. Could not connect to the server: {e}")
+            return False
+        _mark_pushed(conn, chunk, last_op)
+        conflicts += _apply_conflicts(conn, server_data.get('conflicts', []))
+        if not is_last:  # the last chunk commits together with the first pulled page
+            conn.commit()
+        pushed += sum(len(items) for items in chunk.values())
+    log("   ✅ Connected to the server.")
+
+    if server_data.get('up_to_date'):
+        conn.commit()
+        log("✅ Already up to date.")
+        return True
 
-    # --- 3. APPLY SERVER CHANGES LOCALLY ---
+    # --- 3. APPLY SERVER CHANGES LOCALLY, ONE TRANSACTION PER PAGE ---
     items_pulled = 0
-    for table in TABLES:
-        for item in server_data.get(table, []):
-            items_pulled += 1
-            item['synced'] = 1
-            columns = ', '.join(item.keys())
-            placeholders = ', '.join(['?'] * len(item))
-            conn.execute(
-                f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})",
-                tuple(item.values())
-            )
+    while True:
+        items_pulled += _apply_page(conn, server_data)
+        conn.commit()
 
-    print(f"   Pulled {items_pulled} new/updated items from the server.")
+        cursor = server_data.get('next_cursor')
+        if not cursor:
+            break
+        config.update_session({'sync_cursor': cursor, 'sync_cursor_since': since})
 
-    # --- 4. FINALIZE AND CLEAN UP ---
-    for table in TABLES:
-        conn.execute(f"UPDATE {table} SET synced = 1 WHERE user_id = ? AND synced = 0 AND is_deleted = 0", (user_id,))
-        conn.execute(f"DELETE FROM {table} WHERE user_id = ? AND synced = 0 AND is_deleted = 1", (user_id,))
+        try:
+            server_data = _post_sync_with_retry(
+                {'last_sync_seq': since, 'cursor': cursor, 'page_size': SYNC_PAGE_SIZE, 'stream': True},
+                headers, transfer, log
+            )
+        except Exception as e:
+            log(f"   Pulled {items_pulled} new/updated items before the connection dropped.")
+            log(f"❌ Sync interrupted; it will resume on the next sync: {e}")
+            return False
 
-    conn.commit()
-    conn.close()
+    log(f"   Pulled {items_pulled} new/updated items from the server.")
+    log(f"   Transferred {transfer['wire'] / 1024:.1f} KB "
+        f"({(transfer['raw'] - transfer['wire']) / 1024:.1f} KB saved by compression).")
 
-    # Update session file safely
-    session_data['last_sync_time'] = server_data.get('server_time')
-    SESSION_FILE.write_text(json.dumps(session_data, indent=2))
+    # --- 4. FINALIZE AND CLEAN UP ---
+    config.update_session(
+        {'last_sync_seq': server_data.get('server_seq'), 'last_sync_time': current_timestamp()},
+        remove=('sync_cursor', 'sync_cursor_since')
+    )
 
-    if server_data.get('conflicts'):
-        print(f"⚠️  Resolved {len(server_data['conflicts'])} conflicts (server version kept).")
+    if conflicts:
+        log(f"⚠️  Resolved {conflicts} conflicts (server's merged version kept).")
 
-    print("✅ Sync complete!")
+    log("✅ Sync complete!")
+    return True
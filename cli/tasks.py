@@ -1,7 +1,9 @@
 # cli/tasks.py
 import uuid
-from tabulate import tabulate
-from cli.utils import get_db_connection, current_timestamp, print_warning
+from functools import partial
+from cli.constants import LIST_PAGE_SIZE
+from cli.utils import (keyset_page, browse_pages, get_db_connection, current_timestamp, print_warning,
+                       column_mask, record_change, FULL_ROW)
 from cli.auth import load_session
 
 TABLE = "tasks"
@@ -16,14 +18,8 @@ def _get_user_id():
         return None
     return user_id
 
-def view_tasks():
-    """
-    Displays tasks in a table with sequence numbers and returns the full list for CRUD actions.
-    """
-    user_id = _get_user_id()
-    if not user_id:
-        return []
-
+def fetch_tasks(user_id):
+    """Return the user's tasks, most recently modified first, as a list of dicts."""
     conn = get_db_connection()
     cur = conn.cursor()
     cur.execute(f"""
@@ -32,23 +28,53 @@ def view_tasks():
         WHERE is_deleted=0 AND user_id=?
         ORDER BY last_modified DESC
     """, (user_id,))
-    rows = cur.fetchall()
-    conn.close()
+    return [
+        {"id": r[0], "title": r[1], "description": r[2], "due_date": r[3], "priority": r[4], "status": r[5]}
+        for r in cur.fetchall()
+    ]
 
-    if not rows:
-        print("\n⚠️ No tasks found.")
-        return []
+def create_task(user_id, title, description="", due_date="", priority=2):
+    """Insert a new pending task, marked for the next sync. Returns its ID."""
+    task_id = str(uuid.uuid4())
+    ts = current_timestamp()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        INSERT INTO {TABLE} (id, user_id, title, description, due_date, priority, status, last_modified, synced)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+    """, (task_id, user_id, title, description, due_date, int(priority), "pending", ts))
+    record_change(conn, TABLE, task_id, user_id, FULL_ROW)
+    conn.commit()
+    return task_id
+
+def fetch_tasks_page(user_id, anchor=None, forward=True, limit=LIST_PAGE_SIZE):
+    """One window of tasks, most recently modified first (see keyset_page)."""
+    columns = ("id", "title", "description", "due_date", "priority", "status", "last_modified")
+    return keyset_page(TABLE, columns, "last_modified", user_id, anchor, forward, limit)
+
+def _render_tasks(tasks, first):
+    from tabulate import tabulate
 
     headers = ["#", "ID", "Title", "Status", "Priority", "Due Date"]
     table_data = [
-        [i, r[0][:8], r[1], r[5], r[4], r[3]] for i, r in enumerate(rows, 1)
+        [i, t["id"][:8], t["title"], t["status"], t["priority"], t["due_date"]] for i, t in enumerate(tasks, first)
     ]
     print("\n" + tabulate(table_data, headers=headers, tablefmt="grid"))
 
-    return [
-        {"id": r[0], "title": r[1], "description": r[2], "due_date": r[3], "priority": r[4], "status": r[5]}
-        for r in rows
-    ]
+def _browse_tasks(user_id, prompt=None):
+    """Page through tasks; with a prompt, return the task picked by its #."""
+    return browse_pages(partial(fetch_tasks_page, user_id), _render_tasks, "last_modified",
+                        prompt, "⚠️ No tasks found.")
+
+def view_tasks():
+    """
+    Displays tasks a page at a time with sequence numbers.
+    """
+    user_id = _get_user_id()
+    if not user_id:
+        return
+    _browse_tasks(user_id)
 
 def add_task():
     user_id = _get_user_id()
@@ -63,19 +89,8 @@ def add_task():
     description = input("Description (optional): ").strip()
     due_date = input("Due date (YYYY-MM-DD, optional): ").strip()
     priority = input("Priority (1=High, 2=Medium, 3=Low) [2]: ").strip() or "2"
-    status = "pending"  # new tasks always start as pending
 
-    task_id = str(uuid.uuid4())
-    ts = current_timestamp()
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(f"""
-        INSERT INTO {TABLE} (id, user_id, title, description, due_date, priority, status, last_modified, synced)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
-    """, (task_id, user_id, title, description, due_date, int(priority), status, ts))
-    conn.commit()
-    conn.close()
+    create_task(user_id, title, description, due_date, priority)  # new tasks always start as pending
     print("\n✅ Task added locally. Run 'Sync' to push online.")
 
 def edit_task():
@@ -83,17 +98,8 @@ def edit_task():
     if not user_id:
         return
 
-    tasks = view_tasks()
-    if not tasks:
-        return
-
-    try:
-        choice = int(input("\nEnter the # of the task to edit: ").strip())
-        if not (1 <= choice <= len(tasks)):
-            raise ValueError
-        task = tasks[choice - 1]
-    except (ValueError, IndexError):
-        print("\n❌ Invalid selection.")
+    task = _browse_tasks(user_id, "Enter the # of the task to edit")
+    if not task:
         return
 
     print("\n✏️ Editing task. Press Enter to keep current values.")
@@ -116,6 +122,14 @@ def edit_task():
     else:
         status = task['status']
 
+    # Only the columns that actually changed are pushed on the next sync
+    updated = {"title": title, "description": description, "due_date": due_date,
+               "priority": int(priority), "status": status}
+    changed = [column for column, value in updated.items() if value != task[column]]
+    if not changed:
+        print("\nNo changes made.")
+        return
+
     ts = current_timestamp()
     conn = get_db_connection()
     cur = conn.cursor()
@@ -124,8 +138,8 @@ def edit_task():
         SET title=?, description=?, due_date=?, priority=?, status=?, last_modified=?, synced=0
         WHERE id=? AND user_id=?
     """, (title, description, due_date, int(priority), status, ts, task['id'], user_id))
+    record_change(conn, TABLE, task['id'], user_id, column_mask(TABLE, changed))
     conn.commit()
-    conn.close()
     print("\n✅ Task updated locally.")
 
 def delete_task():
@@ -133,17 +147,8 @@ def delete_task():
     if not user_id:
         return
 
-    tasks = view_tasks()
-    if not tasks:
-        return
-
-    try:
-        choice = int(input("\nEnter the # of the task to delete: ").strip())
-        if not (1 <= choice <= len(tasks)):
-            raise ValueError
-        task = tasks[choice - 1]
-    except (ValueError, IndexError):
-        print("\n❌ Invalid selection.")
+    task = _browse_tasks(user_id, "Enter the # of the task to delete")
+    if not task:
         return
 
     confirm = input(f"⚠️ Are you sure you want to delete '{task['title']}'? (y/N): ").strip().lower()
@@ -159,6 +164,6 @@ def delete_task():
         SET is_deleted=1, deleted_at=?, last_modified=?, synced=0
         WHERE id=? AND user_id=?
     """, (ts, ts, task['id'], user_id))
+    record_change(conn, TABLE, task['id'], user_id, column_mask(TABLE, ["is_deleted", "deleted_at"]))
     conn.commit()
-    conn.close()
     print("\n✅ Task marked for deletion. Will be removed on next sync.")
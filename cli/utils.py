@@ -1,28 +1,49 @@
 # cli/utils.py
+import atexit
+import gzip
+import json
 import sqlite3
 from pathlib import Path
 from datetime import datetime, timezone
 import uuid
-from colorama import init, Fore, Style
+import zlib
 from db.connection import get_connection as db_connect
+from db.migrations import apply_migrations, SCHEMA_VERSION, OUTBOX_VERSION
+from cli.constants import LIST_PAGE_SIZE
 
-# Initialize Colorama
-init(autoreset=True)
+# Optional: zstd bodies both ways when both sides have it installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_CODEC_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard else ())
 
 # ==========================
 # Color printing helpers
 # ==========================
+_Fore = None
+
+def _fore():
+    """Colorama's Fore, imported and initialized on first colored print."""
+    global _Fore
+    if _Fore is None:
+        from colorama import init, Fore
+        init(autoreset=True)
+        _Fore = Fore
+    return _Fore
+
 def print_success(msg):
-    print(Fore.GREEN + msg)
+    print(_fore().GREEN + msg)
 
 def print_info(msg):
-    print(Fore.CYAN + msg)
+    print(_fore().CYAN + msg)
 
 def print_warning(msg):
-    print(Fore.YELLOW + msg)
+    print(_fore().YELLOW + msg)
 
 def print_error(msg):
-    print(Fore.RED + msg)
+    print(_fore().RED + msg)
 
 # ==========================
 # Database helpers
@@ -30,48 +51,207 @@ def print_error(msg):
 LOCAL_DB_PATH = Path(__file__).resolve().parent.parent / 'db' / 'local_cache.db'
 SCHEMA_PATH = Path(__file__).resolve().parent.parent / 'db' / 'schema.sql'
 
-# Flag to ensure initialization happens only once
-LOCAL_DB_INITIALIZED = False
+# Applied to the process-wide connection. WAL keeps reads fast while a sync
+# writes, and NORMAL sync is safe in WAL mode.
+LOCAL_DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# One connection for the whole process, opened by initialize_local_db()
+_local_conn = None
 
 def initialize_local_db():
     """
-    Initialize the local DB only once per session.
+    Open the process-wide local DB connection, once per session.
+    The schema script only runs when PRAGMA user_version shows the file is
+    new or behind SCHEMA_VERSION, so starting against a current DB costs
+    one pragma read.
     """
-    global LOCAL_DB_INITIALIZED
-    if LOCAL_DB_INITIALIZED:
-        return  # Already initialized, skip
+    global _local_conn
+    if _local_conn is not None:
+        return _local_conn  # Already initialized, skip
 
     try:
-        if not LOCAL_DB_PATH.exists():
-            print_info(f"🆕 Creating new local DB at {LOCAL_DB_PATH}...")
-        else:
-            print_info(f"🔄 Ensuring local DB schema exists at {LOCAL_DB_PATH}...")
+        is_new = not LOCAL_DB_PATH.exists()
+        conn = open_local_db()
 
-        conn = sqlite3.connect(LOCAL_DB_PATH)
-        with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
-            schema_sql = f.read()
-            conn.executescript(schema_sql)
-        conn.commit()
-        conn.close()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            if is_new:
+                print_info(f"🆕 Creating new local DB at {LOCAL_DB_PATH}...")
+            else:
+                print_info(f"🔄 Upgrading local DB schema at {LOCAL_DB_PATH}...")
+            with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+                conn.executescript(f.read())
+            apply_migrations(conn)
+            if not is_new and version < OUTBOX_VERSION:
+                seed_outbox(conn)
+            print_success("✅ Local DB initialized successfully.")
 
-        print_success("✅ Local DB initialized successfully.")
-        LOCAL_DB_INITIALIZED = True
+        _local_conn = conn
+        atexit.register(close_local_db)
+        return conn
     except Exception as e:
         print_error(f"❌ Failed to initialize local DB: {e}")
         raise
 
-def get_db_connection(db_path=None):
+def open_local_db():
     """
-    Return a SQLite connection to local_cache.db.
-    Ensures schema exists, but silently if already initialized.
+    Open a new connection to local_cache.db with LOCAL_DB_PRAGMAS, for code
+    running off the main thread (e.g. cli/autosync.py). The caller closes it.
     """
-    initialize_local_db()  # prints only once
-    if db_path is None:
-        conn = db_connect()  # default local_cache.db
-    else:
-        conn = db_connect(db_path)
+    conn = sqlite3.connect(LOCAL_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    for pragma in LOCAL_DB_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
+def close_local_db():
+    """Close the process-wide connection (registered to run at exit)."""
+    global _local_conn
+    if _local_conn is not None:
+        _local_conn.close()
+        _local_conn = None
+
+def get_db_connection(db_path=None):
+    """
+    Return the process-wide SQLite connection to local_cache.db.
+    It is shared by every command, so callers commit but never close it.
+    Passing db_path opens a separate connection that the caller must close.
+    """
+    if db_path is not None:
+        return db_connect(db_path)
+    return initialize_local_db()
+
+# ==========================
+# Paged list views
+# ==========================
+def keyset_page(table, columns, order_by, user_id, anchor=None, forward=True, limit=LIST_PAGE_SIZE):
+    """
+    Return one window of a user's live rows, newest first by (order_by, id),
+    as dicts. anchor is the (order_by, id) of the row to continue after, or
+    with forward=False the row to stop before; None starts at the top.
+    Only the window is read, walking the (user_id, is_deleted, order_by, id)
+    index from db/migrations.py.
+    """
+    direction, compare = ("DESC", "<") if forward else ("ASC", ">")
+    keyset = f"AND ({order_by}, id) {compare} (?, ?)" if anchor else ""
+    rows = get_db_connection().execute(f"""
+        SELECT {', '.join(columns)}
+        FROM {table}
+        WHERE is_deleted=0 AND user_id=? {keyset}
+        ORDER BY {order_by} {direction}, id {direction}
+        LIMIT ?
+    """, (user_id, *(anchor or ()), limit)).fetchall()
+    rows = [dict(row) for row in rows]
+    return rows if forward else rows[::-1]
+
+def browse_pages(fetch_page, render, order_by, prompt=None, empty_message="No items found.",
+                 page_size=LIST_PAGE_SIZE):
+    """
+    Show rows one page at a time with next/previous navigation.
+    fetch_page(anchor, forward, limit) returns rows as keyset_page does and
+    render(rows, first_number) prints them, numbered across pages.
+    With a prompt the user picks a row by its # on the current page and the
+    row is returned; otherwise (or on cancel) returns None.
+    """
+    anchor, forward, page = None, True, 0
+    while True:
+        rows = fetch_page(anchor, forward, page_size + 1 if forward else page_size)
+        # One extra row going forward tells us whether a next page exists
+        has_next = len(rows) > page_size if forward else True
+        rows = rows[:page_size]
+        if not rows:
+            print(f"\n{empty_message}")
+            return None
+
+        first = page * page_size + 1
+        render(rows, first)
+        choices = (["n=next"] if has_next else []) + (["p=prev"] if page else [])
+        if prompt is None and not choices:
+            return None
+        choices.append("Enter=back" if prompt is None else "Enter=cancel")
+        choice = input(f"\n{prompt or 'Page ' + str(page + 1)} ({', '.join(choices)}): ").strip().lower()
+
+        if choice == "n" and has_next:
+            anchor, forward, page = (rows[-1][order_by], rows[-1]["id"]), True, page + 1
+        elif choice == "p" and page:
+            anchor, forward, page = (rows[0][order_by], rows[0]["id"]), False, page - 1
+        elif prompt is None or not choice:
+            return None
+        elif choice.isdigit() and first <= int(choice) < first + len(rows):
+            return rows[int(choice) - first]
+        else:
+            print("\n❌ Invalid selection.")
+            return None
+
+# ==========================
+# Column change tracking
+# ==========================
+# Bit i of an outbox entry's mask marks SYNC_COLUMNS[table][i] as edited
+# locally, so a sync pushes only those columns. FULL_ROW (any negative
+# mask) pushes the whole row, e.g. for rows created locally.
+SYNC_COLUMNS = {
+    "tasks": ("title", "description", "due_date", "priority", "status", "is_deleted", "deleted_at"),
+    "notes": ("content", "is_deleted", "deleted_at"),
+    "expenses": ("amount", "category", "description", "date", "is_deleted", "deleted_at"),
+}
+FULL_ROW = -1
+
+def column_mask(table, columns):
+    """Return the mask bits for the given columns of a table."""
+    mask = 0
+    for column in columns:
+        mask |= 1 << SYNC_COLUMNS[table].index(column)
+    return mask
+
+def dirty_columns(table, mask):
+    """Return the columns a mask marks as edited."""
+    if mask <= 0:
+        return SYNC_COLUMNS[table]
+    return tuple(column for i, column in enumerate(SYNC_COLUMNS[table]) if mask & (1 << i))
+
+def merge_masks(a, b):
+    """Combine two masks; FULL_ROW absorbs everything."""
+    if a < 0 or b < 0:
+        return FULL_ROW
+    return a | b
+
+# ==========================
+# Sync outbox
+# ==========================
+# Every local write appends an entry to sync_outbox in the same transaction,
+# and a sync pushes only the rows listed there (see cli/sync.py).
+OUTBOX_INSERT = "INSERT INTO sync_outbox (table_name, row_id, user_id, mask) VALUES (?, ?, ?, ?)"
+
+def record_change(conn, table, row_id, user_id, mask):
+    """Append one local write to the outbox. The caller commits."""
+    conn.execute(OUTBOX_INSERT, (table, row_id, user_id, mask))
+
+def has_pending_changes(conn):
+    """True if any local write is waiting to be pushed."""
+    return conn.execute("SELECT 1 FROM sync_outbox LIMIT 1").fetchone() is not None
+
+def seed_outbox(conn):
+    """
+    Journal the rows still waiting for a push from before the outbox existed.
+    Their dirty_mask, the pre-outbox column tracking, is read here and then
+    cleared; it is not maintained by any later write.
+    """
+    with conn:
+        for table in SYNC_COLUMNS:
+            conn.execute(f"""
+                INSERT INTO sync_outbox (table_name, row_id, user_id, mask)
+                SELECT ?, id, user_id, CASE WHEN dirty_mask > 0 THEN dirty_mask ELSE {FULL_ROW} END
+                FROM {table} WHERE synced = 0
+            """, (table,))
+            conn.execute(f"UPDATE {table} SET dirty_mask = 0 WHERE dirty_mask != 0")
+
 # ==========================
 # Utility helpers
 # ==========================
@@ -83,3 +263,42 @@ def current_timestamp():
 def generate_uuid():
     """Return a new UUID string."""
     return str(uuid.uuid4())
+
+# ==========================
+# Request body compression
+# ==========================
+def encode_json_body(payload, accepted=("gzip",), min_size=1024):
+    """
+    Serialize payload as JSON and compress it with the best encoding the
+    server accepts. Returns (body, headers, raw_size).
+    """
+    raw = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if len(raw) < min_size:
+        return raw, headers, len(raw)
+    if zstandard and "zstd" in accepted:
+        headers["Content-Encoding"] = "zstd"
+        return zstandard.ZstdCompressor(level=3).compress(raw), headers, len(raw)
+    if "gzip" in accepted:
+        headers["Content-Encoding"] = "gzip"
+        return gzip.compress(raw, compresslevel=6), headers, len(raw)
+    return raw, headers, len(raw)
+
+def response_accept_encoding():
+    """Accept-Encoding for responses: the encodings decode_body can read."""
+    return "zstd, gzip" if zstandard else "gzip"
+
+def decode_body(body, encoding=None):
+    """
+    Decode a response body read off the wire with its Content-Encoding.
+    Raises ValueError for corrupt data.
+    """
+    encoding = (encoding or "").strip().lower()
+    try:
+        if encoding == "zstd":
+            return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+        if encoding in ("gzip", "deflate"):
+            return zlib.decompress(body, 47)  # wbits=47 accepts gzip and zlib framing
+    except _CODEC_ERRORS as e:
+        raise ValueError(f"Corrupt {encoding} response body") from e
+    return body
@@ -0,0 +1,301 @@
+"""
+Schema migrations for local_cache.db and server.db.
+
+db/schema.sql is the baseline (v1.1). Every later change is a numbered step
+below, tracked with PRAGMA user_version. Steps must be idempotent: existing
+databases re-run schema.sql before they are migrated.
+"""
+import sqlite3
+
+SYNC_TABLES = ("tasks", "notes", "expenses")
+
+# Text columns covered by each table's FTS5 index, {table}_fts
+SEARCH_COLUMNS = {
+    "tasks": ("title", "description"),
+    "notes": ("content",),
+    "expenses": ("category", "description"),
+}
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+# ========================
+# Steps
+# ========================
+def _add_change_sequence(conn):
+    """
+    Per-user change sequence. Every server-side write stamps the row with the
+    user's next `seq`, so delta pulls are a range scan on (user_id, seq).
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_sync_seq (
+          user_id TEXT PRIMARY KEY,
+          seq INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for table in SYNC_TABLES:
+        if "seq" not in _columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user_seq ON {table}(user_id, seq)")
+
+    # Backfill existing rows in last_modified order, per user
+    pending = []
+    for table in SYNC_TABLES:
+        pending.extend(
+            (row[0], row[1] or "", table, row[2])
+            for row in conn.execute(f"SELECT user_id, last_modified, id FROM {table} WHERE seq = 0")
+        )
+    pending.sort()
+
+    counters = dict(conn.execute("SELECT user_id, seq FROM user_sync_seq").fetchall())
+    updates = {table: [] for table in SYNC_TABLES}
+    for user_id, _, table, item_id in pending:
+        counters[user_id] = counters.get(user_id, 0) + 1
+        updates[table].append((counters[user_id], item_id))
+    for table, rows in updates.items():
+        conn.executemany(f"UPDATE {table} SET seq = ? WHERE id = ?", rows)
+    conn.executemany(
+        "INSERT OR REPLACE INTO user_sync_seq (user_id, seq) VALUES (?, ?)",
+        counters.items()
+    )
+
+
+def _add_column_tracking(conn):
+    """
+    Column-level change tracking for delta sync.
+    dirty_mask (client): bitmap of locally edited columns, -1 = whole row.
+    Superseded by sync_outbox (step 4) and kept only for the upgrade path:
+    seed_outbox reads it once, then clears it, and nothing else uses it.
+    field_seqs (server): JSON {column: seq} of each column's last change,
+    with "*" holding the seq of every column not listed.
+    """
+    for table in SYNC_TABLES:
+        columns = _columns(conn, table)
+        if "dirty_mask" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN dirty_mask INTEGER NOT NULL DEFAULT 0")
+            # Rows already waiting for a push go out whole
+            conn.execute(f"UPDATE {table} SET dirty_mask = -1 WHERE synced = 0")
+        if "field_seqs" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN field_seqs TEXT")
+
+
+def _add_list_indexes(conn):
+    """
+    Indexes matching the list views' keyset order, so a page of live rows
+    is read straight off the index with LIMIT instead of sorting the table.
+    """
+    for table, order_by in (("tasks", "last_modified"), ("notes", "last_modified"), ("expenses", "date")):
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_user_live_{order_by} "
+            f"ON {table}(user_id, is_deleted, {order_by}, id)"
+        )
+
+
+def _add_sync_outbox(conn):
+    """
+    Client-side outbox: an append-only journal of local writes, one entry
+    per write with the mask of columns it touched (-1 = whole row). A sync
+    pushes what the journal lists and deletes the acknowledged entries, so
+    it never scans the data tables. The server DB gets the table but never
+    uses it; the CLI seeds it from unsynced rows (see OUTBOX_VERSION).
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_outbox (
+          op_id INTEGER PRIMARY KEY AUTOINCREMENT,
+          table_name TEXT NOT NULL,
+          row_id TEXT NOT NULL,
+          user_id TEXT NOT NULL,
+          mask INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sync_outbox_row ON sync_outbox(table_name, row_id)")
+
+
+def _add_search_index(conn):
+    """
+    FTS5 full-text indexes over SEARCH_COLUMNS. Each {table}_fts stores its
+    own copy of the text plus the row's `id` (UNINDEXED), and searches join
+    on that id: the data tables' rowids are implicit and a VACUUM or a
+    dump/restore may renumber them. {table}_fts_docs maps each id to its
+    FTS docid (an INTEGER PRIMARY KEY, so it survives VACUUM), letting the
+    triggers update and delete index rows by docid instead of scanning.
+    The index is dropped and rebuilt from the table, so rerunning is safe.
+    Skipped when SQLite is built without FTS5; search then falls back to LIKE.
+    """
+    for table, columns in SEARCH_COLUMNS.items():
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        for trigger in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{trigger}")
+        conn.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        conn.execute(f"DROP TABLE IF EXISTS {table}_fts_docs")
+        try:
+            conn.execute(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5("
+                f"id UNINDEXED, {column_list}, "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+        except sqlite3.OperationalError as e:
+            if "no such module" in str(e):
+                return
+            raise
+        conn.execute(f"CREATE TABLE {table}_fts_docs (docid INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE)")
+
+        old_docid = f"(SELECT docid FROM {table}_fts_docs WHERE id = old.id)"
+        new_docid = f"(SELECT docid FROM {table}_fts_docs WHERE id = new.id)"
+        conn.execute(f"""
+            CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+              INSERT INTO {table}_fts_docs (id) VALUES (new.id);
+              INSERT INTO {table}_fts (rowid, id, {column_list}) VALUES ({new_docid}, new.id, {new_values});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+              DELETE FROM {table}_fts WHERE rowid = {old_docid};
+              DELETE FROM {table}_fts_docs WHERE id = old.id;
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {table}_fts_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+              DELETE FROM {table}_fts WHERE rowid = {old_docid};
+              INSERT INTO {table}_fts (rowid, id, {column_list}) VALUES ({new_docid}, new.id, {new_values});
+            END
+        """)
+        conn.execute(f"INSERT INTO {table}_fts_docs (id) SELECT id FROM {table}")
+        conn.execute(f"""
+            INSERT INTO {table}_fts (rowid, id, {column_list})
+            SELECT d.docid, t.id, {", ".join(f"t.{column}" for column in columns)}
+            FROM {table} t JOIN {table}_fts_docs d ON d.id = t.id
+        """)
+
+
+def _add_filter_indexes(conn):
+    """
+    Partial indexes over live rows (is_deleted = 0) for the task filters,
+    each ending in the list order so a filtered list reads in order straight
+    off the index. Queries must spell the filter as `is_deleted = 0` for
+    SQLite to use them. Also drops the baseline (user_id, last_modified)
+    indexes, which idx_{table}_user_live_* from step 3 made redundant.
+    """
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_status_live "
+        "ON tasks(user_id, status, last_modified) WHERE is_deleted = 0"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_priority_live "
+        "ON tasks(user_id, priority, last_modified) WHERE is_deleted = 0"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_due_live "
+        "ON tasks(user_id, due_date, last_modified) WHERE is_deleted = 0"
+    )
+    for table in SYNC_TABLES:
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_user_lastmod")
+
+
+def _add_expense_summary(conn):
+    """
+    expense_summary: live spending per user, month ('YYYY-MM') and category.
+    Triggers on expenses add and subtract each row as it is inserted,
+    edited, soft-deleted or removed, so every write path (web and sync
+    push) keeps it current and summaries never read the expenses.
+    Groups whose last expense goes away are deleted. Server only.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS expense_summary (
+          user_id TEXT NOT NULL,
+          month TEXT NOT NULL,
+          category TEXT NOT NULL,
+          total REAL NOT NULL DEFAULT 0,
+          count INTEGER NOT NULL DEFAULT 0,
+          PRIMARY KEY (user_id, month, category)
+        ) WITHOUT ROWID
+    """)
+    add = """
+        INSERT INTO expense_summary (user_id, month, category, total, count)
+        SELECT {row}.user_id, substr({row}.date, 1, 7), {row}.category, {row}.amount, 1
+        WHERE {row}.is_deleted = 0
+        ON CONFLICT (user_id, month, category)
+        DO UPDATE SET total = total + excluded.total, count = count + 1;
+    """
+    subtract = """
+        UPDATE expense_summary SET total = total - {row}.amount, count = count - 1
+        WHERE {row}.is_deleted = 0 AND user_id = {row}.user_id
+          AND month = substr({row}.date, 1, 7) AND category = {row}.category;
+        DELETE FROM expense_summary
+        WHERE user_id = {row}.user_id AND month = substr({row}.date, 1, 7)
+          AND category = {row}.category AND count <= 0;
+    """
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS expenses_summary_insert AFTER INSERT ON expenses BEGIN
+          {add.format(row="new")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS expenses_summary_delete AFTER DELETE ON expenses BEGIN
+          {subtract.format(row="old")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS expenses_summary_update
+        AFTER UPDATE OF user_id, amount, category, date, is_deleted ON expenses
+        WHEN old.user_id IS NOT new.user_id OR old.amount IS NOT new.amount
+          OR old.category IS NOT new.category OR substr(old.date, 1, 7) IS NOT substr(new.date, 1, 7)
+          OR old.is_deleted IS NOT new.is_deleted
+        BEGIN
+          {subtract.format(row="old")}
+          {add.format(row="new")}
+        END
+    """)
+
+    conn.execute("DELETE FROM expense_summary")
+    conn.execute("""
+        INSERT INTO expense_summary (user_id, month, category, total, count)
+        SELECT user_id, substr(date, 1, 7), category, SUM(amount), COUNT(*)
+        FROM expenses WHERE is_deleted = 0
+        GROUP BY user_id, substr(date, 1, 7), category
+    """)
+
+
+# (version, step) pairs, in order. Append new steps; never renumber.
+MIGRATIONS = [
+    (1, _add_change_sequence),
+    (2, _add_column_tracking),
+    (3, _add_list_indexes),
+    (4, _add_sync_outbox),
+    (5, _add_search_index),
+    (6, _add_filter_indexes),
+    (7, _add_expense_summary),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+# Steps whose tables only the server reads. Local DBs skip them but still
+# advance past their version, so both sides share one SCHEMA_VERSION.
+SERVER_ONLY_STEPS = {7}
+# Local DBs migrated across this version have their unsynced rows copied
+# into sync_outbox, which only the client can tell apart from server rows
+OUTBOX_VERSION = 4
+
+
+def apply_migrations(conn, server=False):
+    """
+    Bring a database up to SCHEMA_VERSION. Each step commits on its own.
+    SERVER_ONLY_STEPS run only when server is True.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, step in MIGRATIONS:
+        if version >= target:
+            continue
+        conn.execute("BEGIN")
+        try:
+            if server or target not in SERVER_ONLY_STEPS:
+                step(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        version = target
+    return version
@@ -1,6 +1,7 @@
 -- SynQlikk DB Schema
 -- Version 1.1
 -- Applies to BOTH local_cache.db and server.db
+-- Later changes are numbered steps in db/migrations.py
 
 -- ========================
 -- Users Table
@@ -33,7 +34,6 @@ CREATE TABLE IF NOT EXISTS tasks (
   synced INTEGER DEFAULT 0,       -- 0=not synced, 1=synced
   FOREIGN KEY(user_id) REFERENCES users(id)
 );
-CREATE INDEX IF NOT EXISTS idx_tasks_user_lastmod ON tasks(user_id, last_modified);
 
 -- ========================
 -- Notes Table
@@ -48,7 +48,6 @@ CREATE TABLE IF NOT EXISTS notes (
   synced INTEGER DEFAULT 0,
   FOREIGN KEY(user_id) REFERENCES users(id)
 );
-CREATE INDEX IF NOT EXISTS idx_notes_user_lastmod ON notes(user_id, last_modified);
 
 -- ========================
 -- Expenses Table
@@ -66,4 +65,3 @@ CREATE TABLE IF NOT EXISTS expenses (
   synced INTEGER DEFAULT 0,
   FOREIGN KEY(user_id) REFERENCES users(id)
 );
-CREATE INDEX IF NOT EXISTS idx_expenses_user_lastmod ON expenses(user_id, last_modified);
\ No newline at end of file
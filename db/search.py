@@ -0,0 +1,54 @@
+"""
+Full-text search helpers shared by the web app and the CLI.
+
+The {table}_fts indexes are created and kept current by db/migrations.py
+(see SEARCH_COLUMNS) and are joined to their table on `id`. Search terms
+become FTS5 prefix queries, so "rent pa" matches "Pay rent". When SQLite
+lacks FTS5, or the term has no searchable words, callers fall back to LIKE.
+"""
+import re
+from db.migrations import SEARCH_COLUMNS
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# bm25 column weights: a match in a title or category counts for more
+RANK_WEIGHTS = {
+    "tasks": (10.0, 1.0),
+    "notes": (1.0,),
+    "expenses": (5.0, 1.0),
+}
+
+
+def has_fts(conn, table):
+    """True if the FTS5 index for `table` exists in this database."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f"{table}_fts",)
+    ).fetchone() is not None
+
+
+def fts_query(term):
+    """
+    Turn free text into an FTS5 MATCH expression: every word must match,
+    and the last one also as a prefix. Returns None if there are no words.
+    """
+    words = _WORD.findall(term or "")
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def rank_expression(table):
+    """ORDER BY expression ranking {table}_fts matches, best first."""
+    # The leading 0.0 is the unindexed id column
+    weights = ", ".join(str(weight) for weight in (0.0,) + RANK_WEIGHTS[table])
+    return f"bm25({table}_fts, {weights})"
+
+
+def like_clause(table, term, alias=None):
+    """(sql, params) matching `term` anywhere in the table's search columns."""
+    prefix = f"{alias}." if alias else ""
+    columns = SEARCH_COLUMNS[table]
+    sql = "(" + " OR ".join(f"{prefix}{column} LIKE ?" for column in columns) + ")"
+    return sql, [f"%{term}%"] * len(columns)
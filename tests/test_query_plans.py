@@ -0,0 +1,37 @@
+"""
+Query plan tests: every query in web/models.py and cli/ must be served by
+an index. The checks and fixtures live in bench/query_plans.py.
+"""
+import pytest
+
+from bench.query_plans import CLIENT_CHECKS, SERVER_CHECKS, check_plans, client_env, server_env
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    from web.utils import close_db_connections
+
+    env = server_env(str(tmp_path_factory.mktemp("plans") / "server.db"))
+    yield env
+    close_db_connections()
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory, server):
+    from cli.utils import close_local_db
+
+    env = client_env(str(tmp_path_factory.mktemp("plans") / "local_cache.db"), server.user_id)
+    yield env
+    close_local_db()
+
+
+@pytest.mark.parametrize("check", SERVER_CHECKS, ids=lambda check: check.name)
+def test_server_query_plan(server, check):
+    details, bad = check_plans(server, check)
+    assert not bad, "\n".join(["violations:", *bad, "plan:", *details])
+
+
+@pytest.mark.parametrize("check", CLIENT_CHECKS, ids=lambda check: check.name)
+def test_client_query_plan(client, check):
+    details, bad = check_plans(client, check)
+    assert not bad, "\n".join(["violations:", *bad, "plan:", *details])
@@ -0,0 +1,63 @@
+"""
+Paged delta pulls through /api/sync while the server keeps changing rows.
+"""
+import pytest
+
+from web import models
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    from web.app import create_app
+    from web.utils import close_db_connections
+
+    monkeypatch.setenv("SECRET_KEY", "sync-paging-" + "x" * 32)
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "server.db"))
+    app = create_app()
+    yield app
+    close_db_connections()
+
+
+@pytest.fixture
+def user(app):
+    response = app.test_client().post("/api/register", json={"username": "pager", "password": "pw1234"})
+    body = response.get_json()
+    return body["user_id"], {"Authorization": "Bearer " + body["token"]}
+
+
+def pull(client, headers, local, last_sync_seq, stream, after_first_page=None):
+    """Page through one pull into `local` (items by id). Returns server_seq."""
+    body = {"last_sync_seq": last_sync_seq, "page_size": 1, "stream": stream}
+    while True:
+        page = client.post("/api/sync", json=body, headers=headers).get_json()
+        for table_name in models.SYNC_TABLES:
+            for item in page.get(table_name, []):
+                local.setdefault(item["id"], {}).update(item)
+        if not page["next_cursor"]:
+            return page["server_seq"]
+        if after_first_page:
+            after_first_page()
+            after_first_page = None
+        body = {"cursor": page["next_cursor"], "page_size": 1, "stream": stream}
+
+
+@pytest.mark.parametrize("stream", [False, True], ids=["json", "stream"])
+def test_row_edited_between_pages_keeps_earlier_columns(app, user, stream):
+    user_id, headers = user
+    db_path = app.config["DB_PATH"]
+    client, local = app.test_client(), {}
+    first = models.create_task(db_path, user_id, "First", "d", "2025-07-01", 1)
+    second = models.create_task(db_path, user_id, "Second", "d", "2025-07-01", 1)
+
+    seq = pull(client, headers, local, 0, stream)
+    models.update_task(db_path, first, title="First (edited)")
+    models.update_task(db_path, second, title="Second (edited)")
+
+    # The second row moves past this pull's server_seq before its page is read
+    seq = pull(client, headers, local, seq, stream,
+               lambda: models.update_task(db_path, second, status="completed"))
+    pull(client, headers, local, seq, stream)
+
+    for task_id in (first, second):
+        server = models.get_item_by_id(db_path, "tasks", task_id)
+        assert (local[task_id]["title"], local[task_id]["status"]) == (server["title"], server["status"])
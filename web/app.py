@@ -2,7 +2,7 @@ from flask import Flask
 from .auth import auth_bp
 from .routes import main_bp
 from .sync_api import sync_bp
-from .utils import init_server_db
+from .utils import init_server_db, close_db_connections
 from dotenv import load_dotenv
 import os
 
@@ -24,6 +24,9 @@ def create_app():
     app.register_blueprint(main_bp)
     app.register_blueprint(sync_bp)
 
+    # Pooled DB connections are per thread; release them after each request
+    app.teardown_appcontext(close_db_connections)
+
     # Tell Flask that the root URL ('/') should point to the dashboard.
     app.add_url_rule('/', endpoint='main_bp.dashboard')
 
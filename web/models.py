@@ -1,9 +1,76 @@
-import sqlite3
+import json
+import time
 import uuid
+from db.search import fts_query, has_fts, like_clause, rank_expression
 from web.utils import get_db_connection, current_timestamp
 from werkzeug.security import check_password_hash
 
 
+# ========================
+# Change sequence
+# ========================
+def _next_seq(conn, user_id: str, count: int = 1):
+    """
+    Reserve `count` change sequence numbers for a user and return the last one.
+
+    Call it inside the write transaction that stamps the rows: SQLite allows
+    one writer at a time, so sequence order is also commit order and a pull
+    bounded by the user's current seq never skips an uncommitted row.
+    """
+    conn.execute("INSERT OR IGNORE INTO user_sync_seq (user_id, seq) VALUES (?, 0)", (user_id,))
+    conn.execute("UPDATE user_sync_seq SET seq = seq + ? WHERE user_id = ?", (count, user_id))
+    return conn.execute("SELECT seq FROM user_sync_seq WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+def _bump_item_seq(conn, table_name: str, item_id: str, columns):
+    """
+    Stamp an existing item, and the columns that changed, with its owner's
+    next change sequence (see field_seqs in db/migrations.py).
+    """
+    conn.execute(
+        f"INSERT OR IGNORE INTO user_sync_seq (user_id, seq) SELECT user_id, 0 FROM {table_name} WHERE id=?",
+        (item_id,)
+    )
+    conn.execute(
+        f"UPDATE user_sync_seq SET seq = seq + 1 WHERE user_id = (SELECT user_id FROM {table_name} WHERE id=?)",
+        (item_id,)
+    )
+    new_seq = f"(SELECT seq FROM user_sync_seq WHERE user_id = {table_name}.user_id)"
+    paths = ', '.join(f"'$.{column}', {new_seq}" for column in columns)
+    # Right-hand sides see the old row, so a NULL field_seqs starts from the old seq
+    conn.execute(
+        f"UPDATE {table_name} SET field_seqs = json_set(COALESCE(field_seqs, json_object('*', seq)), {paths}), "
+        f"seq = {new_seq} WHERE id=?",
+        (item_id,)
+    )
+
+# Last seq seen per (db_path, user_id) in this process. Seqs only grow, so a
+# cached value is a lower bound even when another worker has moved on.
+_user_seq_cache = {}
+
+def _remember_seq(db_path, user_id: str, seq: int):
+    key = (db_path, user_id)
+    if seq > _user_seq_cache.get(key, 0):
+        _user_seq_cache[key] = seq
+
+def get_user_seq(db_path, user_id: str):
+    """Return the user's latest change sequence (0 if nothing was ever written)."""
+    with get_db_connection(db_path) as conn:
+        row = conn.execute("SELECT seq FROM user_sync_seq WHERE user_id = ?", (user_id,)).fetchone()
+    seq = row['seq'] if row else 0
+    _remember_seq(db_path, user_id, seq)
+    return seq
+
+def is_up_to_date(db_path, user_id: str, client_seq: int):
+    """
+    True if nothing changed for the user after client_seq. Answered from the
+    in-memory cache when it already shows newer changes, otherwise confirmed
+    with one primary-key lookup; the item tables are never read.
+    """
+    if _user_seq_cache.get((db_path, user_id), 0) > client_seq:
+        return False
+    return get_user_seq(db_path, user_id) == client_seq
+
+
 # ========================
 # Users
 # ========================
@@ -44,6 +111,24 @@ def get_user_by_id(db_path, user_id: str):
             (user_id,)
         ).fetchone()
 
+# ========================
+# Search
+# ========================
+def _text_search(conn, table, search_term):
+    """
+    Return (join, condition, params, rank) restricting `table` to rows that
+    match search_term: ranked FTS5 prefix matches when the index exists,
+    otherwise a LIKE scan. rank prefixes the ORDER BY ("" for LIKE).
+    """
+    if not search_term:
+        return "", "", [], ""
+    match = fts_query(search_term)
+    if match and has_fts(conn, table):
+        return (f" JOIN {table}_fts ON {table}_fts.id = {table}.id",
+                f" AND {table}_fts MATCH ?", [match], rank_expression(table) + ", ")
+    condition, params = like_clause(table, search_term, alias=table)
+    return "", f" AND {condition}", params, ""
+
 # ========================
 # Tasks
 # ========================
@@ -53,10 +138,11 @@ def create_task(db_path, user_id, title, description=None, due_date=None, priori
     with get_db_connection(db_path) as conn:
         conn.execute(
             """
-            INSERT INTO tasks (id, user_id, title, description, due_date, priority, status, last_modified)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO tasks (id, user_id, title, description, due_date, priority, status, last_modified, seq)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (task_id, user_id, title, description, due_date, priority, status, current_timestamp())
+            (task_id, user_id, title, description, due_date, priority, status, current_timestamp(),
+             _next_seq(conn, user_id))
         )
         conn.commit()
     return task_id
@@ -64,24 +150,22 @@ def create_task(db_path, user_id, title, description=None, due_date=None, priori
 
 # --- Update get_tasks FUNCTION (with new filter logic) ---
 def get_tasks(db_path, user_id, search_term=None, status=None, priority=None, due_date=None):
-    query = "SELECT * FROM tasks WHERE user_id=? AND is_deleted=0"
-    params = [user_id]
-    if search_term:
-        # **FIX IS HERE**: Search in both title AND description
-        query += " AND (title LIKE ? OR description LIKE ?)"
-        params.extend([f'%{search_term}%', f'%{search_term}%'])
-    if status:
-        query += " AND status = ?"
-        params.append(status)
-    if priority:
-        query += " AND priority = ?"
-        params.append(priority)
-    if due_date:
-        query += " AND due_date = ?"
-        params.append(due_date)
-
-    query += " ORDER BY last_modified DESC"
     with get_db_connection(db_path) as conn:
+        # Search title and description; best matches first
+        join, condition, search_params, rank = _text_search(conn, "tasks", search_term)
+        query = f"SELECT tasks.* FROM tasks{join} WHERE tasks.user_id=? AND tasks.is_deleted=0{condition}"
+        params = [user_id] + search_params
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        if priority:
+            query += " AND priority = ?"
+            params.append(priority)
+        if due_date:
+            query += " AND due_date = ?"
+            params.append(due_date)
+
+        query += f" ORDER BY {rank}tasks.last_modified DESC"
         return conn.execute(query, tuple(params)).fetchall()
 
 
@@ -114,6 +198,7 @@ def update_task(db_path, task_id, title=None, description=None, due_date=None, p
 
     with get_db_connection(db_path) as conn:
         conn.execute(f"UPDATE tasks SET {', '.join(fields)} WHERE id=?", values)
+        _bump_item_seq(conn, "tasks", task_id, [field.split('=')[0] for field in fields])
         conn.commit()
 
 def update_task_status(db_path, task_id, status):
@@ -127,6 +212,7 @@ def delete_task(db_path, task_id):
             "UPDATE tasks SET is_deleted=1, deleted_at=?, last_modified=? WHERE id=?",
             (current_timestamp(), current_timestamp(), task_id)
         )
+        _bump_item_seq(conn, "tasks", task_id, ["is_deleted", "deleted_at", "last_modified"])
         conn.commit()
 
 # ========================
@@ -137,22 +223,19 @@ def create_note(db_path, user_id, content):
     note_id = str(uuid.uuid4())
     with get_db_connection(db_path) as conn:
         conn.execute(
-            "INSERT INTO notes (id, user_id, content, last_modified) VALUES (?, ?, ?, ?)",
-            (note_id, user_id, content, current_timestamp())
+            "INSERT INTO notes (id, user_id, content, last_modified, seq) VALUES (?, ?, ?, ?, ?)",
+            (note_id, user_id, content, current_timestamp(), _next_seq(conn, user_id))
         )
         conn.commit()
     return note_id
 
 # --- Update get_notes FUNCTION (with new filter logic) ---
 def get_notes(db_path, user_id, search_term=None):
-    query = "SELECT * FROM notes WHERE user_id=? AND is_deleted=0"
-    params = [user_id]
-    if search_term:
-        query += " AND content LIKE ?"
-        params.append(f'%{search_term}%')
-    query += " ORDER BY last_modified DESC"
     with get_db_connection(db_path) as conn:
-        return conn.execute(query, tuple(params)).fetchall()
+        join, condition, search_params, rank = _text_search(conn, "notes", search_term)
+        query = (f"SELECT notes.* FROM notes{join} WHERE notes.user_id=? AND notes.is_deleted=0{condition}"
+                 f" ORDER BY {rank}notes.last_modified DESC")
+        return conn.execute(query, tuple([user_id] + search_params)).fetchall()
 
 def update_note(db_path, note_id, content):
     """Update the content of a note."""
@@ -161,6 +244,7 @@ def update_note(db_path, note_id, content):
             "UPDATE notes SET content=?, last_modified=? WHERE id=?",
             (content, current_timestamp(), note_id)
         )
+        _bump_item_seq(conn, "notes", note_id, ["content", "last_modified"])
         conn.commit()
 
 def delete_note(db_path, note_id):
@@ -170,6 +254,7 @@ def delete_note(db_path, note_id):
             "UPDATE notes SET is_deleted=1, deleted_at=?, last_modified=? WHERE id=?",
             (current_timestamp(), current_timestamp(), note_id)
         )
+        _bump_item_seq(conn, "notes", note_id, ["is_deleted", "deleted_at", "last_modified"])
         conn.commit()
 
 # ========================
@@ -181,29 +266,29 @@ def create_expense(db_path, user_id, amount, category, description=None, date=No
     with get_db_connection(db_path) as conn:
         conn.execute(
             """
-            INSERT INTO expenses (id, user_id, amount, category, description, date, last_modified)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO expenses (id, user_id, amount, category, description, date, last_modified, seq)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (expense_id, user_id, amount, category, description, date, current_timestamp())
+            (expense_id, user_id, amount, category, description, date, current_timestamp(),
+             _next_seq(conn, user_id))
         )
         conn.commit()
     return expense_id
 
 # --- Update get_expenses FUNCTION (with new filter logic) ---
 def get_expenses(db_path, user_id, search_term=None, start_date=None, end_date=None):
-    query = "SELECT * FROM expenses WHERE user_id=? AND is_deleted=0"
-    params = [user_id]
-    if search_term:
-        query += " AND (category LIKE ? OR description LIKE ?)"
-        params.extend([f'%{search_term}%', f'%{search_term}%'])
-    if start_date:
-        query += " AND date >= ?"
-        params.append(start_date)
-    if end_date:
-        query += " AND date <= ?"
-        params.append(end_date)
-    query += " ORDER BY date DESC"
     with get_db_connection(db_path) as conn:
+        # Search category and description; best matches first
+        join, condition, search_params, rank = _text_search(conn, "expenses", search_term)
+        query = f"SELECT expenses.* FROM expenses{join} WHERE expenses.user_id=? AND expenses.is_deleted=0{condition}"
+        params = [user_id] + search_params
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        query += f" ORDER BY {rank}date DESC"
         return conn.execute(query, tuple(params)).fetchall()
 
 def update_expense(db_path, expense_id, amount=None, category=None, description=None, date=None):
@@ -231,6 +316,7 @@ def update_expense(db_path, expense_id, amount=None, category=None, description=
 
     with get_db_connection(db_path) as conn:
         conn.execute(f"UPDATE expenses SET {', '.join(fields)} WHERE id=?", values)
+        _bump_item_seq(conn, "expenses", expense_id, [field.split('=')[0] for field in fields])
         conn.commit()
 
 def delete_expense(db_path, expense_id):
@@ -240,61 +326,386 @@ def delete_expense(db_path, expense_id):
             "UPDATE expenses SET is_deleted=1, deleted_at=?, last_modified=? WHERE id=?",
             (current_timestamp(), current_timestamp(), expense_id)
         )
+        _bump_item_seq(conn, "expenses", expense_id, ["is_deleted", "deleted_at", "last_modified"])
         conn.commit()
 
+# ========================
+# Expense summary
+# ========================
+def _expense_summary(conn, user_id, start_month=None, end_month=None):
+    query = "SELECT month, category, round(total, 2) AS total, count FROM expense_summary WHERE user_id=?"
+    params = [user_id]
+    if start_month:
+        query += " AND month >= ?"
+        params.append(start_month)
+    if end_month:
+        query += " AND month <= ?"
+        params.append(end_month)
+    query += " ORDER BY month DESC"
+    return conn.execute(query, tuple(params)).fetchall()
+
+def _monthly_spend(conn, user_id, months):
+    return conn.execute(
+        """
+        SELECT month, round(SUM(total), 2) AS total, SUM(count) AS count
+        FROM expense_summary WHERE user_id=?
+        GROUP BY month ORDER BY month DESC LIMIT ?
+        """,
+        (user_id, months)
+    ).fetchall()
 
-def get_item_by_id(db_path, table_name: str, item_id: str):
-    with get_db_connection(db_path) as conn:
-        return conn.execute(f"SELECT * FROM {table_name} WHERE id=?", (item_id,)).fetchone()
-
-def get_items_since(db_path, table_name: str, user_id: str, timestamp: str = None):
+def get_expense_summary(db_path, user_id, start_month=None, end_month=None):
     """
-    Generic function to get all items of a type.
-    If timestamp is provided, it only gets items modified since that time.
-    Otherwise, it gets ALL items for the user.
+    Spending per month ('YYYY-MM') and category, newest month first. Read from
+    expense_summary, which triggers keep current (see db/migrations.py), so
+    the cost follows the number of groups, not the number of expenses.
     """
     with get_db_connection(db_path) as conn:
-        if timestamp:
-            # This is for a normal delta sync
-            query = f"SELECT * FROM {table_name} WHERE user_id=? AND last_modified > ?"
-            params = (user_id, timestamp)
-        else:
-            # **FIX IS HERE**: This is for the initial hydration sync
-            query = f"SELECT * FROM {table_name} WHERE user_id=?"
-            params = (user_id,)
+        return _expense_summary(conn, user_id, start_month, end_month)
+
+def get_monthly_spend(db_path, user_id, months=6):
+    """Total spend and expense count for the user's latest `months` months, newest first."""
+    with get_db_connection(db_path) as conn:
+        return _monthly_spend(conn, user_id, months)
 
-        return conn.execute(query, params).fetchall()
+# ========================
+# Dashboard
+# ========================
+DASHBOARD_LIMIT = 5    # rows per "recent" section
+DASHBOARD_MONTHS = 6   # months in the spending history
 
-def create_or_update_item(db_path, table_name: str, item: dict):
-    columns = ', '.join(item.keys())
-    placeholders = ', '.join(['?'] * len(item))
-    values = tuple(item.values())
+def get_dashboard(db_path, user_id, month, limit=DASHBOARD_LIMIT, months=DASHBOARD_MONTHS):
+    """
+    Everything the dashboard shows, read on one connection in one read
+    transaction so the sections agree with each other. Each recent list is
+    a LIMIT read off its list index; the pending count comes from the
+    status index and the spending from expense_summary, so the cost does
+    not grow with the user's history. `month` is the current 'YYYY-MM'.
+    """
     with get_db_connection(db_path) as conn:
-        conn.execute(f"INSERT OR REPLACE INTO {table_name} ({columns}) VALUES ({placeholders})", values)
-        conn.commit()
+        conn.execute("BEGIN")
+        try:
+            tasks = conn.execute(
+                "SELECT * FROM tasks WHERE user_id=? AND is_deleted=0 ORDER BY last_modified DESC LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+            notes = conn.execute(
+                "SELECT * FROM notes WHERE user_id=? AND is_deleted=0 ORDER BY last_modified DESC LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+            expenses = conn.execute(
+                "SELECT * FROM expenses WHERE user_id=? AND is_deleted=0 ORDER BY date DESC LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+            pending_tasks = conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE user_id=? AND status='pending' AND is_deleted=0",
+                (user_id,)
+            ).fetchone()[0]
+            month_categories = _expense_summary(conn, user_id, month, month)
+            monthly_spend = _monthly_spend(conn, user_id, months)
+        finally:
+            conn.commit()
+
+    return {
+        "tasks": tasks,
+        "notes": notes,
+        "expenses": expenses,
+        "pending_tasks": pending_tasks,
+        "this_month": month,
+        "month_spend": round(sum(row['total'] for row in month_categories), 2),
+        "month_categories": month_categories,
+        "monthly_spend": monthly_spend,
+    }
 
+def get_item_by_id(db_path, table_name: str, item_id: str):
+    with get_db_connection(db_path) as conn:
+        return conn.execute(f"SELECT * FROM {table_name} WHERE id=?", (item_id,)).fetchone()
 
 # models.py
 
 def get_all_items(db_path, table, user_id):
     """Fetch ALL non-deleted items for a given user."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    rows = conn.execute(
-        f"SELECT * FROM {table} WHERE user_id = ? AND is_deleted = 0",
-        (user_id,)
-    ).fetchall()
-    conn.close()
-    return rows
+    with get_db_connection(db_path) as conn:
+        return conn.execute(
+            f"SELECT * FROM {table} WHERE user_id = ? AND is_deleted = 0",
+            (user_id,)
+        ).fetchall()
 
 
 def get_deleted_items(db_path, table, user_id):
     """Fetch ALL deleted items for a given user."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    rows = conn.execute(
-        f"SELECT id FROM {table} WHERE user_id = ? AND is_deleted = 1",
-        (user_id,)
-    ).fetchall()
-    conn.close()
+    with get_db_connection(db_path) as conn:
+        return conn.execute(
+            f"SELECT id FROM {table} WHERE user_id = ? AND is_deleted = 1",
+            (user_id,)
+        ).fetchall()
+
+
+# ========================
+# Sync
+# ========================
+SYNC_TABLES = ("tasks", "notes", "expenses")
+
+# Columns clients never write (the server assigns or ignores them)
+SERVER_MANAGED_COLUMNS = frozenset({"user_id", "seq", "field_seqs", "synced", "dirty_mask"})
+# Always included in delta pulls so the client can locate and order a row
+IDENTITY_COLUMNS = frozenset({"id", "user_id", "seq", "last_modified"})
+# NOT NULL columns a pushed item must carry to create a row
+REQUIRED_COLUMNS = {
+    "tasks": frozenset({"id", "title"}),
+    "notes": frozenset({"id", "content"}),
+    "expenses": frozenset({"id", "amount", "category", "date"}),
+}
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit.
+ID_BATCH_SIZE = 500
+
+
+_table_columns_cache = {}
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _table_columns(conn, table_name: str):
+    """Column names of a sync table, read once per process."""
+    if table_name not in _table_columns_cache:
+        _table_columns_cache[table_name] = frozenset(
+            row['name'] for row in conn.execute(f"PRAGMA table_info({table_name})")
+        )
+    return _table_columns_cache[table_name]
+
+
+def get_items_by_ids(conn, table_name: str, item_ids, user_id: str = None, columns: str = "*"):
+    """
+    Load rows of a table by ID in batches, only the given user's when
+    user_id is set. Returns a dict keyed by ID.
+    """
+    item_ids = list(item_ids)
+    owner = " AND user_id = ?" if user_id is not None else ""
+    rows = {}
+    for start in range(0, len(item_ids), ID_BATCH_SIZE):
+        batch = item_ids[start:start + ID_BATCH_SIZE]
+        placeholders = ', '.join(['?'] * len(batch))
+        params = batch + [user_id] if user_id is not None else batch
+        for row in conn.execute(f"SELECT {columns} FROM {table_name} WHERE id IN ({placeholders}){owner}", params):
+            rows[row['id']] = row
     return rows
+
+
+def _field_seqs(row):
+    """Decode a row's field_seqs; a NULL means every column changed at the row's seq."""
+    return json.loads(row['field_seqs']) if row['field_seqs'] else {'*': row['seq']}
+
+
+def serialize_item(row, since_seq: int = 0):
+    """
+    Convert a row into the dict sent to clients, without server-only columns.
+    For delta pulls (since_seq > 0) only the columns changed after since_seq
+    are included, alongside the identifying columns.
+    """
+    item = {key: row[key] for key in row.keys() if key not in SERVER_MANAGED_COLUMNS}
+    item['user_id'], item['seq'] = row['user_id'], row['seq']
+    if since_seq <= 0:
+        return item
+    field_seqs = _field_seqs(row)
+    base = field_seqs.get('*', 0)
+    if base > since_seq:
+        return item  # the client has never seen this row
+    return {
+        key: value for key, value in item.items()
+        if key in IDENTITY_COLUMNS or field_seqs.get(key, base) > since_seq
+    }
+
+
+def merge_columns(server_item, item, changes, base_seq: int):
+    """
+    Split a pushed item's changed columns into the ones it wins and the ones
+    it loses, column by column. A column the server has not changed since
+    base_seq (the client's last pull) takes the client's value; a column
+    changed on both sides goes to the later last_modified. Columns already
+    equal on both sides are neither. Returns (won, lost).
+    """
+    field_seqs = _field_seqs(server_item)
+    base = field_seqs.get('*', 0)
+    client_newer = item['last_modified'] > server_item['last_modified']
+    won, lost = {}, []
+    for column, value in changes.items():
+        if column in ('id', 'last_modified') or value == server_item[column]:
+            continue
+        if client_newer or field_seqs.get(column, base) <= base_seq:
+            won[column] = value
+        else:
+            lost.append(column)
+    return won, lost
+
+
+def apply_pushed_items(db_path, user_id: str, pushed: dict, base_seq: int = 0):
+    """
+    Apply items pushed by a client in a single transaction.
+
+    Items may carry only the columns the client changed. Matching server
+    rows of this user are loaded in bulk; items whose ID belongs to another
+    user's row are skipped. Conflicts are resolved in memory column by
+    column (see merge_columns), with base_seq the client's last pulled
+    change sequence; only the columns an item wins are written, so edits
+    to other columns on either side survive. Winners are stamped with fresh
+    change sequence numbers and written with executemany.
+    The transaction starts with BEGIN IMMEDIATE so the write lock is taken
+    before the rows are compared; a deferred read would have to upgrade to
+    a write later and can fail with SQLITE_BUSY under concurrent writers.
+    Returns (conflicts, stats): the full merged server row, tagged with its
+    table, for every item that lost a column, and per-phase row counts and
+    timings.
+    """
+    stats = {"received": sum(len(pushed.get(table_name) or []) for table_name in SYNC_TABLES),
+             "loaded": 0, "applied": 0, "conflicts": 0, "skipped": 0}
+    conflicts = []
+    if not stats["received"]:
+        stats.update(db_wait_ms=0.0, load_ms=0.0, resolve_ms=0.0, write_ms=0.0)
+        return conflicts, stats
+
+    with get_db_connection(db_path) as conn:
+        started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        stats["db_wait_ms"] = _elapsed_ms(started)
+
+        # Phase 1: load the server version of every pushed item, and note
+        # IDs that belong to another user's rows (never written or returned)
+        started = time.perf_counter()
+        server_rows, foreign_ids = {}, {}
+        for table_name in SYNC_TABLES:
+            item_ids = {item['id'] for item in pushed.get(table_name) or []}
+            server_rows[table_name] = get_items_by_ids(conn, table_name, item_ids, user_id)
+            missing = item_ids - server_rows[table_name].keys()
+            foreign_ids[table_name] = get_items_by_ids(conn, table_name, missing, columns="id").keys()
+            stats["loaded"] += len(server_rows[table_name])
+        stats["load_ms"] = _elapsed_ms(started)
+
+        # Phase 2: merge each item into its server row, column by column
+        started = time.perf_counter()
+        winners = []
+        for table_name in SYNC_TABLES:
+            writable = _table_columns(conn, table_name) - SERVER_MANAGED_COLUMNS
+            latest = {}
+            for item in pushed.get(table_name) or []:
+                seen = latest.get(item['id'])
+                if seen is None or item['last_modified'] > seen['last_modified']:
+                    latest[item['id']] = item
+
+            for item_id, item in latest.items():
+                if item_id in foreign_ids[table_name]:
+                    stats["skipped"] += 1
+                    continue
+                server_item = server_rows[table_name].get(item_id)
+                changes = {key: value for key, value in item.items() if key in writable}
+                if server_item is None:
+                    if not REQUIRED_COLUMNS[table_name] <= changes.keys():
+                        stats["skipped"] += 1  # partial item for a row we never had
+                        continue
+                    winners.append((table_name, changes, None, False))
+                    continue
+                won, lost = merge_columns(server_item, item, changes, base_seq)
+                if won:
+                    won['id'] = item_id
+                    won['last_modified'] = max(item['last_modified'], server_item['last_modified'])
+                    winners.append((table_name, won, server_item, bool(lost)))
+                elif lost:
+                    conflicts.append(dict(serialize_item(server_item), table=table_name))
+        stats["resolve_ms"] = _elapsed_ms(started)
+
+        # Phase 3: write all winners in one transaction, grouped by statement
+        started = time.perf_counter()
+        writes = {}
+        if winners:
+            seq = _next_seq(conn, user_id, len(winners)) - len(winners)
+            for table_name, changes, server_item, lost in winners:
+                seq += 1
+                columns = tuple(changes)
+                if server_item is None:
+                    values = tuple(changes.values()) + (user_id, seq)
+                    writes.setdefault(('insert', table_name, columns), []).append(values)
+                else:
+                    field_seqs = _field_seqs(server_item)
+                    field_seqs.update({column: seq for column in columns if column != 'id'})
+                    values = tuple(changes.values()) + (seq, json.dumps(field_seqs), changes['id'])
+                    writes.setdefault(('update', table_name, columns), []).append(values)
+                    if lost:  # the client needs the merged row to converge
+                        merged = dict(zip(server_item.keys(), server_item), **changes, seq=seq)
+                        conflicts.append(dict(serialize_item(merged), table=table_name))
+        stats["conflicts"] = len(conflicts)
+
+        for (kind, table_name, columns), rows in writes.items():
+            if kind == 'insert':
+                placeholders = ', '.join(['?'] * (len(columns) + 2))
+                sql = f"INSERT INTO {table_name} ({', '.join(columns)}, user_id, seq) VALUES ({placeholders})"
+            else:
+                assignments = ', '.join(f"{column}=?" for column in columns)
+                sql = f"UPDATE {table_name} SET {assignments}, seq=?, field_seqs=? WHERE id=?"
+            conn.executemany(sql, rows)
+            stats["applied"] += len(rows)
+        conn.commit()
+        if winners:
+            _remember_seq(db_path, user_id, seq)
+        stats["write_ms"] = _elapsed_ms(started)
+
+    return conflicts, stats
+
+
+def iter_items_page(db_path, user_id: str, since_seq: int, position=None, limit: int = 500):
+    """
+    Yield one page of at most `limit` (table_name, row) pairs whose change
+    sequence is above since_seq, walking tasks, notes and expenses in that
+    order. Rows come straight off the cursor, one table at a time, each read
+    with a range scan on (user_id, seq).
+
+    There is no upper bound: a row edited while the client pages moves to a
+    higher seq and is still delivered with every column changed since
+    since_seq, instead of arriving on the next sync without the earlier ones.
+
+    `position` is the (table_index, last_seq) pair left by the previous
+    page, or None to start from the beginning. The generator's return value
+    (StopIteration.value) is the next position, or None on the last page.
+    """
+    table_index, after = position or (0, since_seq)
+    remaining = limit
+
+    with get_db_connection(db_path) as conn:
+        while table_index < len(SYNC_TABLES):
+            table_name = SYNC_TABLES[table_index]
+            # One extra row tells us whether this table has more to give
+            cursor = conn.execute(
+                f"SELECT * FROM {table_name} WHERE user_id=? AND seq > ? ORDER BY seq LIMIT ?",
+                (user_id, after, remaining + 1)
+            )
+            last_seq = after
+            for row in cursor:
+                if remaining == 0:
+                    cursor.close()
+                    return (table_index, last_seq)
+                yield table_name, row
+                last_seq = row['seq']
+                remaining -= 1
+
+            table_index += 1
+            after = since_seq
+            if remaining == 0 and table_index < len(SYNC_TABLES):
+                return (table_index, since_seq)
+
+    return None
+
+
+def get_items_page(db_path, user_id: str, since_seq: int, position=None, limit: int = 500):
+    """
+    List form of iter_items_page.
+    Returns (items, next_position) with items keyed by table name.
+    """
+    items = {table_name: [] for table_name in SYNC_TABLES}
+    rows = iter_items_page(db_path, user_id, since_seq, position, limit)
+    while True:
+        try:
+            table_name, row = next(rows)
+        except StopIteration as done:
+            return items, done.value
+        items[table_name].append(row)
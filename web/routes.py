@@ -2,7 +2,8 @@ from flask import Blueprint, render_template, session, redirect, url_for, flash,
 from .models import (get_tasks, create_task, update_task, delete_task,
                      get_notes, create_note, update_note, delete_note,
                      get_expenses, create_expense, update_expense, delete_expense,
-                     get_user_by_id)
+                     get_dashboard, get_user_by_id)
+from datetime import datetime, timezone
 from functools import wraps
 
 main_bp = Blueprint("main_bp", __name__)
@@ -23,11 +24,9 @@ def login_required(f):
 def dashboard():
     user_id = session["user_id"]
     db_path = current_app.config["DB_PATH"]
-    # For the dashboard, we get all items without filters
-    tasks = get_tasks(db_path, user_id)
-    notes = get_notes(db_path, user_id)
-    expenses = get_expenses(db_path, user_id)
-    return render_template("dashboard.html", tasks=tasks, notes=notes, expenses=expenses)
+    # Only the rows and totals the dashboard shows, not the whole history
+    this_month = datetime.now(timezone.utc).strftime("%Y-%m")
+    return render_template("dashboard.html", **get_dashboard(db_path, user_id, this_month))
 
 @main_bp.route("/tasks")
 @login_required
@@ -1,15 +1,71 @@
 # web/sync_api.py
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from functools import wraps
 from . import models
 import jwt
+import json
+import re
+import base64
 import datetime
-from .utils import current_timestamp
+import time
+from .utils import (current_timestamp, decompress_body, compress_body, compress_stream,
+                    request_encodings, response_encodings, user_sync_lock)
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
 sync_bp = Blueprint("sync_bp", __name__, url_prefix="/api")
 
+# Pulls are returned in bounded pages; clients follow `next_cursor` until None
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+MAX_STREAM_PAGE_SIZE = 20000  # streamed pages never sit in memory whole
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Sync bodies may be compressed in both directions
+MAX_BODY_BYTES = 64 * 1024 * 1024   # decompressed request size cap
+COMPRESS_MIN_BYTES = 1024           # smaller responses are sent as-is
+
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}$")  # expense summary range bounds, YYYY-MM
+
+
+# --- Body Compression ---
+def read_json_body():
+    """
+    Parse the request's JSON body, decoding its Content-Encoding first.
+    Returns (data, None) or (None, error_response).
+    """
+    encoding = request.headers.get('Content-Encoding', 'identity')
+    try:
+        raw = decompress_body(request.get_data(cache=False), encoding, MAX_BODY_BYTES + 1)
+    except LookupError as e:
+        return None, (jsonify({"error": str(e)}), 415)
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+    if len(raw) > MAX_BODY_BYTES:
+        return None, (jsonify({"error": "Request body too large"}), 413)
+    try:
+        return json.loads(raw), None
+    except ValueError:
+        return None, (jsonify({"error": "Request body is not valid JSON"}), 400)
+
+
+@sync_bp.after_request
+def compress_response(response):
+    """Compress API responses above COMPRESS_MIN_BYTES per Accept-Encoding."""
+    # Tell clients which request encodings we can decode
+    response.headers['Accept-Encoding'] = ', '.join(request_encodings())
+    response.vary.add('Accept-Encoding')
+
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    encoding = request.accept_encodings.best_match(response_encodings())
+    if not encoding or response.content_length is None or response.content_length < COMPRESS_MIN_BYTES:
+        return response
+
+    response.set_data(compress_body(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
 # --- API Authentication Routes ---
 @sync_bp.route("/register", methods=["POST"])
 def api_register():
@@ -82,33 +138,222 @@ def token_required(f):
     return decorated
 
 
+# --- Pull Cursor Helpers ---
+def encode_cursor(state: dict) -> str:
+    """Pack pull pagination state into an opaque, URL-safe token."""
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Unpack a token made by encode_cursor. Raises ValueError if malformed."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        table_index, after = state["position"]
+        since, upto = state["since"], state["upto"]
+    except (TypeError, KeyError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid sync cursor") from e
+    if not all(isinstance(value, int) for value in (table_index, after, since, upto)):
+        raise ValueError("Invalid sync cursor")
+    if not 0 <= table_index < len(models.SYNC_TABLES):
+        raise ValueError("Invalid sync cursor")
+    return state
+
+
+# --- Streaming ---
+def stream_payload(head: dict, rows, tail, since_seq: int):
+    """
+    Yield a sync response as JSON text without building it in memory:
+    the keys of `head`, one array per table filled from `rows` (an
+    iter_items_page generator), then the keys of tail(next_position, row_count).
+    """
+    yield json.dumps(head)[:-1]
+    pending = list(models.SYNC_TABLES)
+    current, row_count = None, 0
+    while True:
+        try:
+            table_name, row = next(rows)
+        except StopIteration as done:
+            next_position = done.value
+            break
+        if table_name != current:
+            if current:
+                yield ']'
+            while pending[0] != table_name:
+                yield f', "{pending.pop(0)}": []'
+            current = pending.pop(0)
+            yield f', "{table_name}": ['
+        else:
+            yield ','
+        yield json.dumps(models.serialize_item(row, since_seq))
+        row_count += 1
+    if current:
+        yield ']'
+    for table_name in pending:
+        yield f', "{table_name}": []'
+    yield ', ' + json.dumps(tail(next_position, row_count))[1:]
+
+
+def buffer_chunks(chunks, size: int = STREAM_CHUNK_BYTES):
+    """Join small text chunks into byte blocks of about `size` bytes."""
+    buffer, buffered = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, buffered = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
 # --- Main Sync Endpoint ---
 @sync_bp.route('/sync', methods=['POST'])
 @token_required
 def sync_data(user_id):
-    """Handles the main two-way sync transaction."""
-    client_data = request.get_json()
+    """
+    Handles the main two-way sync transaction.
+
+    Items pushed by the client are applied first, then one page of server
+    changes with a change sequence above the client's `last_sync_seq` is
+    returned (everything when it is missing). Pushed items may carry only
+    their changed columns, and delta pulls return only the columns changed
+    since `last_sync_seq` for rows the client already has. When `next_cursor` is set the
+    client sends it back (with no pushed items) to fetch the following page;
+    `server_seq` from the last page is the client's next `last_sync_seq`.
+
+    Pushed items are merged column by column against the changes made since
+    `last_sync_seq`. Every item that loses a column comes back in
+    `conflicts` as the full merged row, tagged with its `table`.
+
+    With `"stream": true` the page is written out table by table as rows are
+    read, so server memory stays flat and larger pages are allowed.
+
+    With `"pull": false` only the push is applied and no page is returned;
+    clients send large pushes as several such chunks before a final sync.
+
+    A sync that pushes nothing and is already current at `last_sync_seq` is
+    answered with a small `"up_to_date": true` response and no item lists.
+    """
+    client_data, error = read_json_body()
+    if error:
+        return error
     db_path = current_app.config['DB_PATH']
-    client_last_sync = client_data.get('last_sync_time')
-
-    response_payload = {"tasks": [], "notes": [], "expenses": [], "conflicts": []}
-
-    # Phase 1: Process items pushed FROM the client (This logic is correct)
-    for item_type in ["tasks", "notes", "expenses"]:
-        for client_item in client_data.get(item_type, []):
-            client_item['user_id'] = user_id
-            server_item = models.get_item_by_id(db_path, item_type, client_item['id'])
-            if server_item is None or client_item['last_modified'] > server_item['last_modified']:
-                models.create_or_update_item(db_path, item_type, client_item)
-            else:
-                response_payload['conflicts'].append(dict(server_item))
-
-    # **FIX IS HERE**: This block now runs correctly even if client_last_sync is None
-    # Phase 2: Pull items FROM the server to the client
-    for item_type in ["tasks", "notes", "expenses"]:
-        server_changes = models.get_items_since(db_path, item_type, user_id, client_last_sync)
-        if server_changes:
-            response_payload[item_type].extend([dict(item) for item in server_changes])
-
-    response_payload['server_time'] = current_timestamp()
+
+    stream = bool(client_data.get('stream'))
+    try:
+        max_page_size = MAX_STREAM_PAGE_SIZE if stream else MAX_PAGE_SIZE
+        page_size = min(max(int(client_data.get('page_size') or DEFAULT_PAGE_SIZE), 1), max_page_size)
+        base_seq = int(client_data.get('last_sync_seq') or 0)
+        if client_data.get('cursor'):
+            cursor_state = decode_cursor(client_data['cursor'])
+        else:
+            cursor_state = {"since": int(client_data.get('last_sync_seq') or 0), "upto": None, "position": None}
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    pushed = {item_type: client_data.get(item_type, []) for item_type in models.SYNC_TABLES}
+
+    # Fast path: nothing pushed and nothing new since the client's last sync
+    client_seq = client_data.get('last_sync_seq')
+    if (not client_data.get('cursor') and not any(pushed.values()) and isinstance(client_seq, int)
+            and models.is_up_to_date(db_path, user_id, client_seq)):
+        return jsonify({
+            "up_to_date": True,
+            "conflicts": [],
+            "next_cursor": None,
+            "server_seq": client_seq,
+            "server_time": current_timestamp(),
+        })
+
+    # Phase 1: Apply items pushed FROM the client in one batched transaction.
+    # Syncs of the same user are serialized from here until server_seq is
+    # fixed; the pull itself runs unlocked.
+    with user_sync_lock(user_id) as lock_wait_ms:
+        conflicts, push_stats = models.apply_pushed_items(db_path, user_id, pushed, base_seq)
+        push_stats["lock_wait_ms"] = lock_wait_ms
+        if client_data.get('pull') is False:
+            # Push-only chunk of a larger push; the client pulls with its last chunk
+            return jsonify({
+                "conflicts": conflicts,
+                "next_cursor": None,
+                "stats": {"push": push_stats},
+                "server_time": current_timestamp(),
+            })
+
+        # Phase 2: Pull one page of items FROM the server to the client.
+        # server_seq is fixed when the first page is served. Pages are not
+        # bounded by it: rows changed while the client pages are still sent in
+        # full, and those already paged past arrive on the next sync.
+        server_seq = cursor_state['upto']
+        if server_seq is None:
+            server_seq = models.get_user_seq(db_path, user_id)
+    started = time.perf_counter()
+
+    def finish(next_position, row_count):
+        next_cursor = None
+        if next_position is not None:
+            next_cursor = encode_cursor({
+                "since": cursor_state['since'],
+                "upto": server_seq,
+                "position": list(next_position),
+            })
+        pull_stats = {"rows": row_count, "ms": round((time.perf_counter() - started) * 1000, 2)}
+        return {
+            "next_cursor": next_cursor,
+            "stats": {"push": push_stats, "pull": pull_stats},
+            "server_seq": server_seq,
+            "server_time": current_timestamp(),
+        }
+
+    if stream:
+        rows = models.iter_items_page(
+            db_path, user_id, cursor_state['since'], cursor_state['position'], page_size
+        )
+        body = buffer_chunks(stream_payload({"conflicts": conflicts}, rows, finish, cursor_state['since']))
+        encoding = request.accept_encodings.best_match(response_encodings())
+        if encoding:
+            body = compress_stream(body, encoding)
+        response = Response(stream_with_context(body), mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    items, next_position = models.get_items_page(
+        db_path, user_id, cursor_state['since'], cursor_state['position'], page_size
+    )
+    response_payload = {
+        item_type: [models.serialize_item(item, cursor_state['since']) for item in items[item_type]]
+        for item_type in models.SYNC_TABLES
+    }
+    response_payload['conflicts'] = conflicts
+    response_payload.update(finish(next_position, sum(len(rows) for rows in items.values())))
     return jsonify(response_payload)
+
+
+# --- Expense Summary ---
+@sync_bp.route('/expenses/summary', methods=['GET'])
+@token_required
+def expense_summary(user_id):
+    """
+    Spending per month and category from the incrementally maintained
+    expense_summary table. Optional `from` and `to` (YYYY-MM) bound the
+    months; months are listed newest first, each with its categories
+    biggest first.
+    """
+    start_month, end_month = request.args.get('from'), request.args.get('to')
+    for month in (start_month, end_month):
+        if month and not MONTH_PATTERN.match(month):
+            return jsonify({"error": "from and to must be months in YYYY-MM format"}), 400
+
+    months = []
+    for row in models.get_expense_summary(current_app.config['DB_PATH'], user_id, start_month, end_month):
+        if not months or months[-1]["month"] != row['month']:
+            months.append({"month": row['month'], "total": 0.0, "count": 0, "categories": []})
+        month = months[-1]
+        month["total"] = round(month["total"] + row['total'], 2)
+        month["count"] += row['count']
+        month["categories"].append({"category": row['category'], "total": row['total'], "count": row['count']})
+    for month in months:
+        month["categories"].sort(key=lambda category: category["total"], reverse=True)
+    return jsonify({"months": months})
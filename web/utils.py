@@ -1,11 +1,43 @@
+import gzip
+import io
 import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timezone
+from db.migrations import apply_migrations
+
+# Optional codecs: used when installed, gzip is always available
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_CODEC_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard else ())
 
 SCHEMA_PATH = Path(__file__).resolve().parent.parent / "db" / "schema.sql"
 
+# Applied once to every pooled connection. WAL lets readers proceed while a
+# writer holds the lock, which matters once gunicorn runs several workers.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# One connection per thread and database file, closed on app teardown.
+_pool = threading.local()
 
-# Initialize the server database
+
+# Initialize the server database and bring its schema up to date
 def init_server_db(db_path: str):
     db_file = Path(db_path)
     if not db_file.exists():
@@ -16,13 +48,139 @@ def init_server_db(db_path: str):
     else:
         print(f"[SERVER DB] Already exists at: {db_file}")
 
-def get_db_connection(db_path: str):
+    connect = sqlite3.connect(db_file)
+    try:
+        apply_migrations(connect, server=True)
+    finally:
+        connect.close()
+
+def _open_connection(db_path: str):
     connect = sqlite3.connect(db_path)
     connect.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        connect.execute(pragma)
     return connect
 
+def get_db_connection(db_path: str):
+    """
+    Return this thread's pooled connection to db_path, opening it on first use.
+    Use it as a transaction context (`with get_db_connection(...) as conn`);
+    do not close it, close_db_connections() does that on teardown.
+    """
+    connections = getattr(_pool, "connections", None)
+    if connections is None:
+        connections = _pool.connections = {}
+    connect = connections.get(db_path)
+    if connect is None:
+        connect = connections[db_path] = _open_connection(db_path)
+    return connect
+
+def close_db_connections(exception=None):
+    """Close every pooled connection opened by the current thread."""
+    connections = getattr(_pool, "connections", None)
+    while connections:
+        _, connect = connections.popitem()
+        connect.close()
+
+
+# ==========================
+# Sync coordination
+# ==========================
+# Syncs of one user run one at a time in this process; different users run
+# in parallel. Across worker processes the push transaction's BEGIN IMMEDIATE
+# does the same job, waiting on busy_timeout instead of failing mid-way.
+_user_locks = {}
+_user_locks_guard = threading.Lock()
+
+@contextmanager
+def user_sync_lock(user_id: str):
+    """
+    Hold the per-user sync lock for the duration of the block.
+    Yields the time spent waiting for it, in milliseconds.
+    """
+    with _user_locks_guard:
+        entry = _user_locks.get(user_id)
+        if entry is None:
+            entry = _user_locks[user_id] = [threading.Lock(), 0]
+        entry[1] += 1  # holders and waiters, so idle users are dropped
+
+    started = time.perf_counter()
+    entry[0].acquire()
+    try:
+        yield round((time.perf_counter() - started) * 1000, 2)
+    finally:
+        entry[0].release()
+        with _user_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _user_locks[user_id]
+
 
 def current_timestamp():
     """Returns the current time in UTC ISO 8601 format with 'Z'."""
     # **FIX IS HERE**: Use timezone.utc to make the timestamp aware
     return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+# ==========================
+# HTTP body compression
+# ==========================
+def request_encodings():
+    """Content-Encodings accepted for request bodies, in preference order."""
+    return (["zstd"] if zstandard else []) + ["gzip", "deflate"]
+
+def response_encodings():
+    """Content-Encodings we can produce for responses, in preference order."""
+    return (["zstd"] if zstandard else []) + (["br"] if brotli else []) + ["gzip"]
+
+def decompress_body(data: bytes, encoding: str, limit: int):
+    """
+    Decode a request body, producing at most `limit` bytes so a small
+    compressed payload cannot expand without bound.
+    Raises LookupError for unsupported encodings and ValueError for corrupt data.
+    """
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return data[:limit]
+    if encoding not in request_encodings():
+        raise LookupError(f"Unsupported Content-Encoding: {encoding}")
+    try:
+        if encoding == "zstd":
+            reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+            chunks, size = [], 0
+            while size < limit:
+                chunk = reader.read(min(limit - size, 1 << 20))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+            return b"".join(chunks)
+        # wbits=47 accepts both gzip and zlib ("deflate") framing
+        return zlib.decompressobj(wbits=47).decompress(data, limit)
+    except _CODEC_ERRORS as e:
+        raise ValueError(f"Corrupt {encoding} request body") from e
+
+def compress_body(data: bytes, encoding: str):
+    """Encode a response body with one of response_encodings()."""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+def compress_stream(chunks, encoding: str):
+    """Incrementally encode an iterable of byte chunks with one of response_encodings()."""
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        compress, flush = compressor.compress, compressor.flush
+    elif encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        compress, flush = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip framing
+        compress, flush = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield flush()